@@ -0,0 +1,250 @@
+"""
+Speculative acknowledgements.
+
+While a handler runs, a watchdog notices when the assistant has gone quiet. If the
+silence lasts longer than the intent's threshold, it says one of utils.opening_text
+("Just a second sir.") and the handler carries on; its answer is queued behind.
+
+The threshold adapts per intent from the longest silence of its recent turns:
+  no history yet        ACK_THRESHOLD_MS
+  usually slower        ACK_MIN_THRESHOLD_MS, acknowledge straight away
+  usually quick         ACK_MARGIN x its p95, between those two bounds
+"""
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from random import choice
+from decouple import config
+from tracing import percentile
+from utils import opening_text
+
+ACK_ENABLED = config('ACK_ENABLED', default=True, cast=bool)
+ACK_THRESHOLD_MS = config('ACK_THRESHOLD_MS', default=1000, cast=float)
+ACK_MIN_THRESHOLD_MS = config('ACK_MIN_THRESHOLD_MS', default=300, cast=float)
+ACK_MARGIN = config('ACK_MARGIN', default=1.5, cast=float)
+# Turns per intent the threshold is learned from, and how many it needs first
+ACK_WINDOW = config('ACK_WINDOW', default=20, cast=int)
+ACK_MIN_SAMPLES = 3
+POLL_SECONDS = 0.05
+
+
+class Turn:
+    """One handler run"""
+
+    def __init__(self, intent, threshold):
+        self.intent = intent
+        self.threshold = threshold
+        self.started = time.perf_counter()
+        self.silent_since = self.started  # the queue is idle when a handler starts
+        self.longest_silence = 0.0
+        self.acknowledged = None  # seconds of silence before the acknowledgement
+        self.waiting_for_user = False
+
+
+class Acknowledger:
+    """Says an opening_text line when a handler leaves the user in silence for too long"""
+
+    def __init__(self, say, is_quiet, phrases=opening_text, enabled=ACK_ENABLED,
+                 threshold=ACK_THRESHOLD_MS / 1000, min_threshold=ACK_MIN_THRESHOLD_MS / 1000,
+                 margin=ACK_MARGIN, window=ACK_WINDOW):
+        self.say = say  # queues speech without counting as the handler's output
+        self.is_quiet = is_quiet  # True when nothing is queued or playing
+        self.phrases = phrases
+        self.enabled = enabled
+        self.default_threshold = threshold
+        self.min_threshold = min_threshold
+        self.margin = margin
+        # Longest silence of each recent turn, per intent
+        self.silences = defaultdict(lambda: deque(maxlen=window))
+        self.turn = None
+        # The turn each handler thread is running, so a handler abandoned by Stop never touches the next one
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._watchdog = None
+
+    def threshold(self, intent):
+        """Seconds of silence before this intent gets an acknowledgement"""
+        silences = list(self.silences[intent])
+        if len(silences) < ACK_MIN_SAMPLES:
+            return self.default_threshold
+        if percentile(silences, 0.5) > self.default_threshold:
+            return self.min_threshold
+        return min(self.default_threshold, max(self.min_threshold, percentile(silences, 0.95) * self.margin))
+
+    def begin(self, intent):
+        """A handler is starting; returns the turn to pass to end()"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.turn = Turn(intent or "unknown", self.threshold(intent or "unknown"))
+            self._local.turn = self.turn
+            if self._watchdog is None or not self._watchdog.is_alive():
+                self._watchdog = threading.Thread(target=self._watch, name="acknowledger", daemon=True)
+                self._watchdog.start()
+            self._wake.notify()
+            return self.turn
+
+    def _own_turn(self):
+        """The calling thread's turn, if it is still the current one; called with the lock held"""
+        turn = getattr(self._local, "turn", None)
+        return turn if turn is not None and turn is self.turn else None
+
+    def output(self):
+        """The handler said something, ending any silence"""
+        with self._lock:
+            turn = self._own_turn()
+            if turn:
+                self._end_silence(turn)
+
+    def end(self, turn, record=True):
+        """The handler has returned; learn from its silences unless it was cut short"""
+        if getattr(self._local, "turn", None) is turn:
+            self._local.turn = None
+        with self._lock:
+            if turn is None or turn is not self.turn:
+                return
+            self._end_silence(turn)
+            self.turn = None
+        if record:
+            self.silences[turn.intent].append(turn.longest_silence)
+        if turn.acknowledged is not None:
+            print(f"Acknowledged '{turn.intent}' after {turn.acknowledged * 1000:.0f} ms of silence "
+                  f"(longest silence {turn.longest_silence * 1000:.0f} ms)")
+
+    def cancel(self):
+        """Drop the current turn without learning from it, e.g. on Stop"""
+        with self._lock:
+            turn = self.turn
+        self.end(turn, record=False)
+
+    @contextmanager
+    def waiting_for_user(self):
+        """The handler is waiting for the user to answer, which is not running late"""
+        with self._lock:
+            turn = self._own_turn()
+            if turn:
+                self._end_silence(turn)
+                turn.waiting_for_user = True
+        try:
+            yield
+        finally:
+            with self._lock:
+                if turn:
+                    turn.waiting_for_user = False
+                    turn.silent_since = None
+
+    def _end_silence(self, turn):
+        # Called with the lock held
+        if turn.silent_since is not None:
+            turn.longest_silence = max(turn.longest_silence, time.perf_counter() - turn.silent_since)
+            turn.silent_since = None
+
+    def _watch(self):
+        while True:
+            with self._wake:
+                self._wake.wait_for(lambda: self.turn is not None)
+                self._wake.wait(POLL_SECONDS)
+                turn = self.turn
+                if turn is None or turn.waiting_for_user or turn.acknowledged is not None:
+                    continue
+                now = time.perf_counter()
+                if not self.is_quiet():
+                    # Still talking; silence starts once the queue drains
+                    self._end_silence(turn)
+                    continue
+                if turn.silent_since is None:
+                    turn.silent_since = now
+                    continue
+                if now - turn.silent_since < turn.threshold:
+                    continue
+                # After this the silence is kept open until the handler speaks, so it is learned in full
+                turn.acknowledged = now - turn.silent_since
+            self.say(choice(self.phrases))
+
+
+def check():
+    """Drive the acknowledger with simulated handlers; returns a list of failures"""
+    failures = []
+    said = []
+    acknowledger = Acknowledger(say=said.append, is_quiet=lambda: True, threshold=0.4, min_threshold=0.1)
+
+    def run(intent, seconds, waiting=0.0):
+        said.clear()
+        turn = acknowledger.begin(intent)
+        if waiting:
+            with acknowledger.waiting_for_user():
+                time.sleep(waiting)
+        time.sleep(seconds)
+        acknowledger.output()
+        acknowledger.end(turn)
+        return turn
+
+    # Quick handlers never acknowledge and keep a threshold close to their own latency
+    for _ in range(ACK_MIN_SAMPLES):
+        run("time", 0.01)
+    if said:
+        failures.append(f"quick intent was acknowledged: {said}")
+    if acknowledger.threshold("time") != 0.1:
+        failures.append(f"quick intent threshold is {acknowledger.threshold('time'):.2f} s, expected 0.10 s")
+
+    # A slow handler with no history is acknowledged at the default threshold...
+    turn = run("news", 0.6)
+    if len(said) != 1 or not 0.35 <= (turn.acknowledged or 0) <= 0.5:
+        failures.append(f"first slow turn: said {said} after {turn.acknowledged}")
+    for _ in range(ACK_MIN_SAMPLES - 1):
+        run("news", 0.6)
+    # ...and once it is known to be slow, straight away
+    turn = run("news", 0.6)
+    if len(said) != 1 or not 0.05 <= (turn.acknowledged or 0) <= 0.2:
+        failures.append(f"learned slow turn: said {said} after {turn.acknowledged}")
+
+    # Waiting for the user to answer is not silence
+    turn = run("wikipedia", 0.05, waiting=0.6)
+    if said:
+        failures.append(f"acknowledged while waiting for the user: {said}")
+
+    # A handler abandoned by Stop that then waits for input must not touch the next session's turn
+    said.clear()
+    stopped = threading.Event()
+    next_turn = {}
+
+    def abandoned_handler():
+        acknowledger.begin("email")
+        stopped.wait()
+        with acknowledger.waiting_for_user():
+            time.sleep(0.6)
+
+    abandoned = threading.Thread(target=abandoned_handler)
+    abandoned.start()
+    time.sleep(0.05)
+    acknowledger.cancel()
+    next_turn["turn"] = acknowledger.begin("news")
+    stopped.set()
+    time.sleep(0.3)
+    if next_turn["turn"].waiting_for_user:
+        failures.append("an abandoned handler marked the new turn as waiting for the user")
+    abandoned.join()
+    acknowledger.end(next_turn["turn"])
+    if not said:
+        failures.append("the new turn was not acknowledged while an abandoned handler waited for input")
+
+    # Stop mid-turn: no acknowledgement afterwards and nothing learned
+    said.clear()
+    turn = acknowledger.begin("email")
+    acknowledger.cancel()
+    time.sleep(0.6)
+    acknowledger.end(turn)
+    if said or acknowledger.silences["email"]:
+        failures.append(f"cancelled turn said {said} and learned {list(acknowledger.silences['email'])}")
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("All acknowledgement checks passed" if not failures else f"{len(failures)} acknowledgement checks failed")
+    sys.exit(1 if failures else 0)
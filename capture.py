@@ -0,0 +1,249 @@
+"""Always-on audio capture with a ring buffer and voice-activity endpointing"""
+import collections
+import math
+import queue
+import threading
+import time
+import wave
+from array import array
+import speech_recognition as sr
+from decouple import config
+
+# "continuous" keeps one capture thread running; "per-turn" opens the mic for each turn
+CAPTURE_MODE = config('CAPTURE_MODE', default='continuous')
+CAPTURE_SAMPLE_RATE = config('CAPTURE_SAMPLE_RATE', default=16000, cast=int)
+CAPTURE_FRAME_MS = config('CAPTURE_FRAME_MS', default=30, cast=int)
+# Audio kept from before speech was detected, so the first syllable isn't clipped
+CAPTURE_PREROLL_MS = config('CAPTURE_PREROLL_MS', default=300, cast=int)
+# Voiced audio needed to start an utterance, and silence needed to end one
+VAD_START_MS = config('VAD_START_MS', default=90, cast=int)
+VAD_END_MS = config('VAD_END_MS', default=800, cast=int)
+# Frames louder than the ambient noise floor by this factor count as speech
+VAD_SPEECH_RATIO = config('VAD_SPEECH_RATIO', default=1.5, cast=float)
+VAD_MIN_THRESHOLD = config('VAD_MIN_THRESHOLD', default=300, cast=float)
+# Utterances kept for the next reader; older ones are dropped (0 keeps everything)
+CAPTURE_MAX_QUEUED = config('CAPTURE_MAX_QUEUED', default=4, cast=int)
+# Let the user interrupt the assistant by talking over it (best with headphones or echo cancellation)
+BARGE_IN = config('BARGE_IN', default=False, cast=bool)
+
+
+class MicrophoneSource:
+    """Reads fixed-size frames from the default microphone"""
+
+    def __init__(self, sample_rate=CAPTURE_SAMPLE_RATE, frame_ms=CAPTURE_FRAME_MS):
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.frame_size = sample_rate * frame_ms // 1000
+        self._microphone = sr.Microphone(sample_rate=sample_rate, chunk_size=self.frame_size)
+        self._source = None
+
+    def open(self):
+        self._source = self._microphone.__enter__()
+        self.sample_width = self._source.SAMPLE_WIDTH
+
+    def read(self):
+        """Return the next frame, or b"" when the source is exhausted"""
+        return self._source.stream.read(self.frame_size)
+
+    def close(self):
+        if self._source is not None:
+            self._microphone.__exit__(None, None, None)
+            self._source = None
+
+
+class PCMFileSource:
+    """
+    Fake microphone that replays a WAV or raw 16-bit mono PCM file.
+    With realtime=True frames are delivered at the rate they would arrive from a device.
+    """
+
+    def __init__(self, path, sample_rate=CAPTURE_SAMPLE_RATE, frame_ms=CAPTURE_FRAME_MS, realtime=False):
+        self.path = str(path)
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.frame_ms = frame_ms
+        self.realtime = realtime
+        self._data = b""
+        self._offset = 0
+
+    def open(self):
+        if self.path.endswith(".wav"):
+            with wave.open(self.path, "rb") as f:
+                self.sample_rate = f.getframerate()
+                self.sample_width = f.getsampwidth()
+                self._data = f.readframes(f.getnframes())
+        else:
+            with open(self.path, "rb") as f:
+                self._data = f.read()
+        self.frame_size = self.sample_rate * self.frame_ms // 1000
+        self._offset = 0
+
+    def read(self):
+        size = self.frame_size * self.sample_width
+        frame = self._data[self._offset:self._offset + size]
+        self._offset += size
+        if self.realtime and frame:
+            time.sleep(self.frame_ms / 1000)
+        return frame
+
+    def close(self):
+        self._data = b""
+
+
+def frame_energy(frame, sample_width=2):
+    """RMS energy of a frame of signed 16-bit samples"""
+    if sample_width != 2 or len(frame) < 2:
+        return 0.0
+    samples = array("h", frame[:len(frame) - len(frame) % 2])
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+
+class EnergyVAD:
+    """Energy-based voice activity detector with an adaptive noise floor"""
+
+    def __init__(self, threshold=None, ratio=VAD_SPEECH_RATIO, min_threshold=VAD_MIN_THRESHOLD):
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.noise_floor = (threshold / ratio) if threshold else min_threshold / ratio
+
+    @property
+    def threshold(self):
+        return max(self.min_threshold, self.noise_floor * self.ratio)
+
+    def is_speech(self, frame, sample_width=2):
+        energy = frame_energy(frame, sample_width)
+        voiced = energy > self.threshold
+        if not voiced:
+            # Track the ambient level so the threshold follows the room
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * energy
+        return voiced
+
+
+class ContinuousCapture:
+    """
+    Reads the source on a background thread, keeps recent audio in a ring buffer,
+    and queues each utterance the VAD detects as an sr.AudioData.
+    """
+
+    def __init__(self, source=None, vad=None, phrase_time_limit=10,
+                 on_speech_start=None, should_discard=None, max_queued=CAPTURE_MAX_QUEUED):
+        self.source = source or MicrophoneSource()
+        self.vad = vad or EnergyVAD()
+        self.phrase_time_limit = phrase_time_limit
+        self.on_speech_start = on_speech_start
+        # Utterances that start while this returns True are dropped (e.g. the assistant hearing itself)
+        self.should_discard = should_discard
+        self.utterances = queue.Queue(maxsize=max_queued)
+        self.in_speech = False
+        self._running = False
+        self._thread = None
+        self.finished = threading.Event()
+
+    def start(self):
+        """Open the source and start the capture thread"""
+        if self._running:
+            return
+        self.source.open()
+        self._running = True
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._run, name="audio-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop capturing and release the source"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.source.close()
+
+    def next_utterance(self, timeout=None, cancelled=None):
+        """
+        Return the next utterance, raising sr.WaitTimeoutError if none starts in time
+        or once cancelled() returns True (the utterance is then left for the next reader).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if cancelled is not None and cancelled():
+                raise sr.WaitTimeoutError("listening cancelled")
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self.in_speech or cancelled is not None:
+                wait = 0.1 if wait is None else min(wait, 0.1)
+            try:
+                return self.utterances.get(timeout=wait)
+            except queue.Empty:
+                # A phrase that has already started is allowed to finish
+                if self.in_speech:
+                    continue
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+    def put(self, audio):
+        """Queue an utterance, dropping the oldest one if nobody has been reading"""
+        while True:
+            try:
+                self.utterances.put_nowait(audio)
+                return
+            except queue.Full:
+                try:
+                    self.utterances.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def clear(self):
+        """Drop utterances that have not been consumed yet"""
+        while True:
+            try:
+                self.utterances.get_nowait()
+            except queue.Empty:
+                return
+
+    def _run(self):
+        frame_ms = self.source.frame_size * 1000 / self.source.sample_rate
+        preroll = collections.deque(maxlen=max(1, int(CAPTURE_PREROLL_MS / frame_ms)))
+        start_frames = max(1, int(VAD_START_MS / frame_ms))
+        end_frames = max(1, int(VAD_END_MS / frame_ms))
+        max_frames = int(self.phrase_time_limit * 1000 / frame_ms)
+
+        utterance = None
+        voiced_run = 0
+        silent_run = 0
+        discard = False
+        try:
+            while self._running:
+                frame = self.source.read()
+                if not frame:
+                    break
+                voiced = self.vad.is_speech(frame, self.source.sample_width)
+
+                if utterance is None:
+                    preroll.append(frame)
+                    voiced_run = voiced_run + 1 if voiced else 0
+                    if voiced_run >= start_frames:
+                        utterance = list(preroll)
+                        preroll.clear()
+                        self.in_speech = True
+                        silent_run = 0
+                        discard = bool(self.should_discard and self.should_discard())
+                        if self.on_speech_start and not discard:
+                            self.on_speech_start()
+                    continue
+
+                utterance.append(frame)
+                silent_run = 0 if voiced else silent_run + 1
+                if silent_run >= end_frames or len(utterance) >= max_frames:
+                    self._emit(utterance, discard)
+                    utterance = None
+                    voiced_run = 0
+                    self.in_speech = False
+
+            if utterance:
+                self._emit(utterance, discard)
+        finally:
+            self.in_speech = False
+            self.finished.set()
+
+    def _emit(self, frames, discard):
+        if discard:
+            return
+        self.put(sr.AudioData(b"".join(frames), self.source.sample_rate, self.source.sample_width))
@@ -0,0 +1,210 @@
+"""
+Headless mode: a Qt-free stand-in for CommunicationChannel and a local HTTP control API.
+
+  GET  /status   {"running": ..., "status": ...}
+  POST /start    same as pressing Wake MAch
+  POST /stop     same as pressing Stop
+  POST /pause    pause the speech that is playing (POST /resume to continue)
+  GET  /events   Server-Sent Events stream of the chat messages and status changes
+  GET  /metrics  rolling p50/p95/p99 per turn stage, in milliseconds (see tracing.py)
+
+Web pages are kept out: any page can reach 127.0.0.1, and a DNS-rebinding page can even
+look same-origin. Every request must name this server in its Host header (127.0.0.1,
+localhost or CONTROL_HOST, with the port), and POSTs that carry another Origin or a form
+Content-Type are rejected. Set CONTROL_TOKEN to also require "Authorization: Bearer <token>"
+on every request.
+"""
+import hmac
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from decouple import config
+from tracing import tracer
+
+CONTROL_HOST = config('CONTROL_HOST', default='127.0.0.1')
+CONTROL_PORT = config('CONTROL_PORT', default=8765, cast=int)
+CONTROL_TOKEN = config('CONTROL_TOKEN', default='')
+# What a cross-site HTML form can send without a CORS preflight
+FORM_CONTENT_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data", "text/plain")
+# Events kept for clients that connect late; slow clients drop events past their own queue size
+EVENT_BACKLOG = config('EVENT_BACKLOG', default=100, cast=int)
+EVENT_QUEUE_SIZE = 1000
+# Comment lines sent to idle /events clients, so disconnects are noticed
+KEEPALIVE_SECONDS = 15
+
+
+class EventChannel:
+    """Same interface as jarvis_ui.CommunicationChannel, publishing to subscribers instead of a window"""
+
+    def __init__(self, backlog=EVENT_BACKLOG):
+        self.status = "idle"
+        self.recent = deque(maxlen=backlog)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def add_message(self, message, msg_type):
+        """Add a message to the chat"""
+        self._publish({"event": "message", "type": msg_type, "message": str(message)})
+
+    def update_status(self, status):
+        """Update the assistant status"""
+        with self._lock:
+            if status == self.status:
+                return
+            self.status = status
+        self._publish({"event": "status", "status": status})
+
+    def subscribe(self, replay=False):
+        """Return a queue that receives every event from now on (after the backlog, if replay)"""
+        events = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        with self._lock:
+            if replay:
+                for event in self.recent:
+                    events.put_nowait(event)
+            self._subscribers.add(events)
+        return events
+
+    def unsubscribe(self, events):
+        with self._lock:
+            self._subscribers.discard(events)
+
+    def _publish(self, event):
+        event["time"] = time.time()
+        with self._lock:
+            self.recent.append(event)
+            subscribers = list(self._subscribers)
+        for events in subscribers:
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+
+
+class ControlServer:
+    """Local HTTP API to start, stop and watch the assistant"""
+
+    def __init__(self, channel, start, stop, is_running, pause=None, resume=None, host=CONTROL_HOST,
+                 port=CONTROL_PORT, token=CONTROL_TOKEN):
+        self.channel = channel
+        self.token = token
+        self.is_running = is_running
+        self.actions = {"/start": start, "/stop": stop, "/pause": pause, "/resume": resume}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def allowed_hosts(self):
+        """Host header values that name this server"""
+        host, port = self.server.server_address[:2]
+        names = {"127.0.0.1", "localhost", "[::1]"}
+        if host not in ("0.0.0.0", "::", ""):
+            names.add(host)
+        return {f"{name}:{port}" for name in names}
+
+    def start(self):
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="control-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def state(self):
+        return {"running": self.is_running(), "status": self.channel.status}
+
+    def _handler(self):
+        control = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def known_host(self):
+                """Refuse requests for other host names, e.g. through DNS rebinding; answers 403"""
+                if self.headers.get("Host", "").lower() in control.allowed_hosts():
+                    return True
+                self.send_json({"error": "unknown host"}, 403)
+                return False
+
+            def authorized(self):
+                """Check the token, if one is configured; answers 401 and returns False otherwise"""
+                if not control.token:
+                    return True
+                if hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {control.token}"):
+                    return True
+                self.send_json({"error": "unauthorized"}, 401)
+                return False
+
+            def from_browser(self):
+                """A cross-site request from a web page rather than a local client"""
+                origin = self.headers.get("Origin")
+                content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                trusted = {f"http://{host}" for host in control.allowed_hosts()}
+                return (origin is not None and origin.lower() not in trusted) or content_type in FORM_CONTENT_TYPES
+
+            def do_GET(self):
+                if not self.known_host() or not self.authorized():
+                    return
+                path = self.path.split("?")[0]
+                if path == "/status":
+                    self.send_json(control.state())
+                elif path == "/metrics":
+                    self.send_json(tracer.summary())
+                elif path == "/events":
+                    self.stream_events(replay="replay=1" in self.path)
+                else:
+                    self.send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                if not self.known_host():
+                    return
+                if self.from_browser():
+                    self.send_json({"error": "cross-site requests are not allowed"}, 403)
+                    return
+                if not self.authorized():
+                    return
+                action = control.actions.get(self.path)
+                if action is None:
+                    self.send_json({"error": "not found"}, 404)
+                    return
+                action()
+                self.send_json(control.state())
+
+            def send_json(self, data, code=200):
+                body = json.dumps(data).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def stream_events(self, replay):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                events = control.channel.subscribe(replay)
+                try:
+                    while True:
+                        try:
+                            event = events.get(timeout=KEEPALIVE_SECONDS)
+                            self.wfile.write(f"event: {event['event']}\ndata: {json.dumps(event)}\n\n".encode())
+                        except queue.Empty:
+                            self.wfile.write(b": keepalive\n\n")
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    control.channel.unsubscribe(events)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
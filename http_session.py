@@ -0,0 +1,107 @@
+"""Shared, pooled HTTP session used for every outbound call"""
+import sys
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from decouple import config, Csv
+
+HTTP_CONNECT_TIMEOUT = config('HTTP_CONNECT_TIMEOUT', default=3.05, cast=float)
+HTTP_READ_TIMEOUT = config('HTTP_READ_TIMEOUT', default=10, cast=float)
+HTTP_RETRIES = config('HTTP_RETRIES', default=2, cast=int)
+HTTP_BACKOFF = config('HTTP_BACKOFF', default=0.3, cast=float)
+HTTP_POOL_SIZE = config('HTTP_POOL_SIZE', default=4, cast=int)
+# Per-host overrides, e.g. "api.elevenlabs.io=8,wttr.in=2"
+HTTP_HOST_POOL_SIZES = config('HTTP_HOST_POOL_SIZES', default='api.elevenlabs.io=8', cast=Csv())
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _make_adapter(pool_size):
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        # Never POST: a retried synthesis request is billed again and keeps the speech worker
+        # waiting instead of falling back. Connection failures are still retried, as nothing was sent.
+        allowed_methods=frozenset(["HEAD", "GET", "OPTIONS"]),
+        raise_on_status=False
+    )
+    return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+
+def build_session():
+    """Create a keep-alive session with retries and per-host connection pools"""
+    session = requests.Session()
+    default_adapter = _make_adapter(HTTP_POOL_SIZE)
+    session.mount("https://", default_adapter)
+    session.mount("http://", default_adapter)
+
+    for entry in HTTP_HOST_POOL_SIZES:
+        host, _, size = entry.partition("=")
+        if not host or not size:
+            continue
+        adapter = _make_adapter(int(size))
+        session.mount(f"https://{host.strip()}", adapter)
+        session.mount(f"http://{host.strip()}", adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def get(url, **kwargs):
+    """GET through the shared session with the default timeout"""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return get_session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    """POST through the shared session with the default timeout"""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return get_session().post(url, **kwargs)
+
+
+def warm_up(url):
+    """Open a pooled connection to the host ahead of the first real request"""
+    try:
+        get_session().head(url, timeout=DEFAULT_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Connection warm-up failed for {url}: {str(e)}")
+
+
+def benchmark(url, count=20, verify=True):
+    """Compare per-request latency of one-off requests against the pooled session"""
+    def run(fetch):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            fetch(url, timeout=DEFAULT_TIMEOUT, verify=verify).content
+            timings.append(time.perf_counter() - started)
+        return sorted(timings)[len(timings) // 2]
+
+    fresh = run(requests.get)
+    pooled = run(get_session().get)
+    print(f"Fresh connection median: {fresh * 1000:.1f} ms")
+    print(f"Pooled session median:   {pooled * 1000:.1f} ms")
+    print(f"Saved per request:       {(fresh - pooled) * 1000:.1f} ms")
+    return fresh, pooled
+
+
+if __name__ == "__main__":
+    # Usage: python http_session.py https://localhost:8443/ [--insecure]
+    if len(sys.argv) < 2:
+        print("Usage: python http_session.py URL [--insecure]")
+    else:
+        benchmark(sys.argv[1], verify="--insecure" not in sys.argv[2:])
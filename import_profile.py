@@ -0,0 +1,81 @@
+"""
+Import-time breakdown for cold launch, built on `python -X importtime`.
+
+Usage: python import_profile.py [module] [top_n]
+       python import_profile.py --launch    (window vs headless startup time and memory)
+"""
+import os
+import subprocess
+import sys
+import time
+
+
+def profile(module="main", top=15):
+    """Import the module in a fresh interpreter and return (total_us, [(cumulative_us, self_us, name)])"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    # The module's own row includes everything it pulled in, but not interpreter startup (site etc.)
+    total = next((cumulative for cumulative, _, name in rows if name.strip() == module), 0)
+    rows.sort(reverse=True)
+    return total, rows[:top]
+
+
+def resident_memory_mb(pid):
+    """VmRSS of another process (Linux)"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def profile_launch(args, settle=1.0, timeout=60):
+    """
+    Start `python main.py *args` and return (seconds until it prints "ready", resident MB after settling).
+    The microphone and wake word are turned off so both modes do the same work.
+    """
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+               WAKE_WORD_ENABLED="False", CAPTURE_MODE="per-turn", PYTHONUNBUFFERED="1")
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "main.py", *args], env=env, text=True,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        ready = None
+        deadline = started + timeout
+        for line in process.stdout:
+            if " ready " in f" {line} ":
+                ready = time.perf_counter() - started
+                break
+            if time.perf_counter() > deadline:
+                break
+        time.sleep(settle)
+        memory = resident_memory_mb(process.pid) if process.poll() is None else 0.0
+        return ready, memory
+    finally:
+        process.kill()
+        process.wait()
+
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--launch"]:
+    for label, args in (("window", []), ("headless", ["--headless"])):
+        ready, memory = profile_launch(args)
+        ready = f"{ready * 1000:.0f} ms" if ready is not None else "never"
+        print(f"{label}: ready in {ready}, {memory:.1f} MB resident")
+elif __name__ == "__main__":
+    module = sys.argv[1] if len(sys.argv) > 1 else "main"
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    total, rows = profile(module, top)
+    print(f"Importing {module}: {total / 1000:.1f} ms")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative, self_us, name in rows:
+        print(f"{cumulative / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {name}")
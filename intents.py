@@ -0,0 +1,156 @@
+"""Declarative intent registry compiled into a single word-boundary matcher"""
+import re
+import sys
+import timeit
+
+# (intent, priority, phrases). Lower priority wins when several intents match one query;
+# ties go to the match that starts first. Commands keep the order of the original if/elif
+# chain, so "play the news on youtube" is still a YouTube request.
+INTENTS = [
+    ("exit", 0, ["stop", "exit"]),
+
+    ("school_mode", 10, ["school mode"]),
+    ("open_notepad", 11, ["open notepad"]),
+    ("open_discord", 12, ["open discord"]),
+    ("open_cmd", 13, ["open command prompt", "open cmd"]),
+    ("open_camera", 14, ["open camera"]),
+    ("open_calculator", 15, ["open calculator"]),
+    # The trailing space requires a following word, so "the shop is open" is not a command
+    ("open_app", 16, ["open ", "launch ", "start "]),
+    ("ip_address", 17, ["ip address"]),
+    ("wikipedia", 18, ["wikipedia"]),
+    ("youtube", 19, ["youtube"]),
+    ("google_search", 20, ["search on google"]),
+    ("whatsapp", 21, ["send whatsapp message"]),
+    ("email", 22, ["send an email"]),
+    ("joke", 23, ["joke", "jokes"]),
+    ("advice", 24, ["advice"]),
+    ("trending_movies", 25, ["trending movies"]),
+    ("news", 26, ["news"]),
+    ("weather", 27, ["weather"]),
+
+    ("how_are_you", 40, ["how are you", "how's it going", "how do you do", "how are things"]),
+    ("capabilities", 41, ["what can you do", "help me", "your abilities", "your features"]),
+    ("thanks", 42, ["thank you", "thanks", "appreciate it"]),
+    ("identity", 43, ["who are you", "what are you", "what's your name"]),
+    ("time", 44, ["what time is it", "what's the time", "tell me the time"]),
+    ("date", 45, ["what date is it", "what's the date", "tell me the date"]),
+
+    ("greetings", 50, ["hello", "hi", "hey", "greetings"]),
+]
+
+# Regression corpus: utterance -> expected intent (None means no intent)
+INTENT_EXAMPLES = [
+    ("stop", "exit"),
+    ("please stop now", "exit"),
+    ("unstoppable", None),
+    ("hello there", "greetings"),
+    ("hi", "greetings"),
+    ("this is nothing", None),
+    ("hey open notepad", "open_notepad"),
+    ("how are you doing", "how_are_you"),
+    ("what can you do", "capabilities"),
+    ("thank you so much", "thanks"),
+    ("what's your name", "identity"),
+    ("what time is it", "time"),
+    ("tell me the date", "date"),
+    ("activate school mode", "school_mode"),
+    ("open discord", "open_discord"),
+    ("open cmd", "open_cmd"),
+    ("open command prompt", "open_cmd"),
+    ("open camera", "open_camera"),
+    ("open calculator", "open_calculator"),
+    ("open spotify", "open_app"),
+    ("launch safari", "open_app"),
+    ("what is my ip address", "ip_address"),
+    ("search wikipedia", "wikipedia"),
+    ("play something on youtube", "youtube"),
+    ("search on google", "google_search"),
+    ("send whatsapp message", "whatsapp"),
+    ("send an email", "email"),
+    ("tell me a joke", "joke"),
+    ("tell me some jokes", "joke"),
+    ("give me some advice", "advice"),
+    ("what are the trending movies", "trending_movies"),
+    ("read the news", "news"),
+    ("what's the weather like", "weather"),
+    ("thanks, what's the weather", "weather"),
+    ("newspaper", None),
+    ("what time does the shop open", None),
+    ("hey can you open", "greetings"),
+    ("restart", None),
+    ("play the news on youtube", "youtube"),
+    ("open the weather app", "open_app"),
+    ("tell me a joke about the news", "joke"),
+    ("school mode and the news", "school_mode"),
+]
+
+
+class IntentRouter:
+    """Matches every intent phrase in one pass of a single compiled regex"""
+
+    def __init__(self, intents=INTENTS):
+        self.priorities = {}
+        self.intent_for_phrase = {}
+        entries = []
+        for name, priority, phrases in intents:
+            self.priorities[name] = priority
+            for phrase in phrases:
+                self.intent_for_phrase[phrase] = name
+                entries.append((priority, -len(phrase), phrase))
+
+        # At each position the first alternative that matches wins, so order by priority, then length
+        entries.sort()
+        alternation = "|".join(re.escape(phrase) for _, _, phrase in entries)
+        # A lookahead makes matches zero-width, so overlapping phrases are all seen
+        self.pattern = re.compile(rf"(?=\b({alternation})\b)")
+
+    def match(self, query):
+        """Return the best matching intent name, or None"""
+        best = None
+        best_priority = None
+        for found in self.pattern.finditer(query.lower()):
+            name = self.intent_for_phrase[found.group(1)]
+            priority = self.priorities[name]
+            if best_priority is None or priority < best_priority:
+                best, best_priority = name, priority
+                if priority == 0:
+                    break
+        return best
+
+
+def check(router=None):
+    """Run the regression corpus, returning the list of mismatches"""
+    router = router or IntentRouter()
+    failures = []
+    for utterance, expected in INTENT_EXAMPLES:
+        actual = router.match(utterance)
+        if actual != expected:
+            failures.append((utterance, expected, actual))
+    return failures
+
+
+def benchmark(number=20000):
+    """Compare the compiled router against a linear substring scan over the same registry"""
+    router = IntentRouter()
+    queries = [utterance for utterance, _ in INTENT_EXAMPLES]
+
+    def linear(query):
+        for name, _, phrases in sorted(INTENTS, key=lambda intent: intent[1]):
+            if any(phrase in query for phrase in phrases):
+                return name
+        return None
+
+    for label, fn in (("linear scan", linear), ("compiled router", router.match)):
+        seconds = timeit.timeit(lambda: [fn(query) for query in queries], number=number // len(queries))
+        per_query = seconds / (number // len(queries) * len(queries))
+        print(f"{label}: {per_query * 1e6:.2f} us per query")
+
+
+if __name__ == "__main__":
+    failures = check()
+    for utterance, expected, actual in failures:
+        print(f"FAIL: {utterance!r} expected {expected}, got {actual}")
+    print(f"{len(INTENT_EXAMPLES) - len(failures)}/{len(INTENT_EXAMPLES)} examples routed correctly")
+    benchmark()
+    sys.exit(1 if failures else 0)
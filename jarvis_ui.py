@@ -1,34 +1,243 @@
 import sys
 import os
+import json
 import threading
 import time
+from collections import deque
+from pathlib import Path
+from decouple import config
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QPushButton, 
                             QVBoxLayout, QHBoxLayout, QWidget, QTextEdit, QScrollArea,
-                            QFrame, QSizePolicy, QGraphicsDropShadowEffect)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QObject, QSize, QPropertyAnimation, QEasingCurve, pyqtProperty, QRect
+                            QFrame, QSizePolicy, QGraphicsDropShadowEffect, QListView,
+                            QStyledItemDelegate, QAbstractItemView, QGraphicsScene, QGraphicsPixmapItem)
+from PyQt5.QtCore import (Qt, QTimer, pyqtSignal, QObject, QSize, QPropertyAnimation, QEasingCurve, pyqtProperty, QRect, QRectF,
+                          QAbstractListModel, QModelIndex, QEvent)
 from PyQt5.QtGui import (QFont, QIcon, QMovie, QPixmap, QColor, QPalette, QLinearGradient, 
-                        QBrush, QPainter, QPainterPath, QRadialGradient, QPen, QFontDatabase)
+                        QBrush, QPainter, QPainterPath, QRadialGradient, QPen, QFontDatabase, QFontMetrics)
+
+# Messages kept in the chat view; older ones are only in the history file
+CHAT_MAX_MESSAGES = config('CHAT_MAX_MESSAGES', default=500, cast=int)
+CHAT_HISTORY_FILE = config('CHAT_HISTORY_FILE', default=str(Path.home() / ".cache" / "mach" / "chat_history.jsonl"))
+
+# Frame rate cap for the logo animation
+LOGO_FPS = config('LOGO_FPS', default=30, cast=int)
+
+# Minimum time between two deliveries of queued UI updates (about one frame)
+UI_UPDATE_INTERVAL_MS = config('UI_UPDATE_INTERVAL_MS', default=16, cast=int)
 
 class CommunicationChannel(QObject):
-    """Class to handle communication between the UI and the assistant"""
+    """
+    Class to handle communication between the UI and the assistant.
+    Updates from any thread are queued and delivered on the GUI thread in batches,
+    at most once per UI_UPDATE_INTERVAL_MS; only the last status of a batch is delivered.
+    """
     update_signal = pyqtSignal(str, str)  # message, type (user/assistant/status)
+    messages_signal = pyqtSignal(list)  # [(message, type), ...] delivered together
     status_signal = pyqtSignal(str)  # status update
+    _flush_requested = pyqtSignal()
     
-    def __init__(self):
+    def __init__(self, interval_ms=UI_UPDATE_INTERVAL_MS, coalesce=True):
         super().__init__()
+        self.coalesce = coalesce
+        self._pending_messages = []
+        self._pending_status = None
+        self._scheduled = False
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+        self._interval = interval_ms / 1000
+        
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        # Queued, so worker threads only post an event and the timer is started on the GUI thread
+        self._flush_requested.connect(self._schedule_flush, Qt.QueuedConnection)
         
     def add_message(self, message, msg_type):
         """Add a message to the chat"""
-        self.update_signal.emit(message, msg_type)
+        if not self.coalesce:
+            self.update_signal.emit(message, msg_type)
+            self.messages_signal.emit([(message, msg_type)])
+            return
+        with self._lock:
+            self._pending_messages.append((message, msg_type))
+            self._request_flush()
         
     def update_status(self, status):
         """Update the assistant status"""
-        self.status_signal.emit(status)
+        if not self.coalesce:
+            self.status_signal.emit(status)
+            return
+        with self._lock:
+            # Only the latest status in a batch matters
+            self._pending_status = status
+            self._request_flush()
+    
+    def _request_flush(self):
+        # Called with the lock held
+        if not self._scheduled:
+            self._scheduled = True
+            self._flush_requested.emit()
+    
+    def _schedule_flush(self):
+        wait = self._interval - (time.perf_counter() - self._last_flush)
+        self._timer.start(max(0, int(wait * 1000)))
+    
+    def flush(self):
+        """Deliver everything queued so far (runs on the GUI thread)"""
+        with self._lock:
+            messages, self._pending_messages = self._pending_messages, []
+            status, self._pending_status = self._pending_status, None
+            self._scheduled = False
+        self._last_flush = time.perf_counter()
+        
+        if messages:
+            for message, msg_type in messages:
+                self.update_signal.emit(message, msg_type)
+            self.messages_signal.emit(messages)
+        if status:
+            self.status_signal.emit(status)
 
-class GlowingCircle(QWidget):
-    """Widget that creates a glowing circle animation similar to the Jarvis logo"""
+class ChatLogModel(QAbstractListModel):
+    """Chat messages capped in memory, with every message appended to a history file on disk"""
+    
+    def __init__(self, max_messages=CHAT_MAX_MESSAGES, history_file=CHAT_HISTORY_FILE, parent=None):
+        super().__init__(parent)
+        self.max_messages = max_messages
+        self.messages = deque()  # (timestamp, msg_type, message, {width: height})
+        self.history = None
+        if history_file:
+            try:
+                Path(history_file).parent.mkdir(parents=True, exist_ok=True)
+                self.history = open(history_file, "a", encoding="utf-8")
+            except OSError as e:
+                print(f"Chat history unavailable: {str(e)}")
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.messages)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.messages):
+            return None
+        if role == Qt.UserRole:
+            return self.messages[index.row()]
+        if role == Qt.DisplayRole:
+            return self.messages[index.row()][2]
+        return None
+    
+    def append(self, message, msg_type):
+        """Add a message, rolling the oldest out of memory once over the cap"""
+        timestamp = time.strftime("%H:%M:%S")
+        if self.history:
+            self.history.write(json.dumps({"time": timestamp, "type": msg_type, "message": message}) + "\n")
+        
+        if len(self.messages) >= self.max_messages:
+            self.beginRemoveRows(QModelIndex(), 0, 0)
+            self.messages.popleft()
+            self.endRemoveRows()
+        
+        row = len(self.messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.messages.append((timestamp, msg_type, str(message), {}))
+        self.endInsertRows()
+    
+    def append_many(self, messages):
+        """Add a batch of (message, msg_type) with one insert and at most one removal"""
+        timestamp = time.strftime("%H:%M:%S")
+        if self.history:
+            for message, msg_type in messages:
+                self.history.write(json.dumps({"time": timestamp, "type": msg_type, "message": message}) + "\n")
+        # Every message reaches the history file; only the newest fit in memory
+        messages = messages[-self.max_messages:]
+        
+        overflow = len(self.messages) + len(messages) - self.max_messages
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self.messages.popleft()
+            self.endRemoveRows()
+        
+        row = len(self.messages)
+        self.beginInsertRows(QModelIndex(), row, row + len(messages) - 1)
+        self.messages.extend((timestamp, msg_type, str(message), {}) for message, msg_type in messages)
+        self.endInsertRows()
+    
+    def clear(self):
+        """Empty the view; the history file is kept"""
+        self.beginResetModel()
+        self.messages.clear()
+        self.endResetModel()
+    
+    def flush(self):
+        if self.history:
+            self.history.flush()
+
+class ChatMessageDelegate(QStyledItemDelegate):
+    """Paints one chat message: a timestamp and sender line, then the wrapped message"""
+    
+    PADDING = 12
+    # msg_type -> (label, label color, text color, italic)
+    STYLES = {
+        "user": ("You:", QColor("#4CAF50"), QColor("#FFFFFF"), False),
+        "assistant": ("MAch:", QColor("#007AFF"), QColor("#FFFFFF"), False),
+        "status": ("", QColor("#888888"), QColor(255, 255, 255, 178), True),
+        "error": ("Error:", QColor("#F44336"), QColor("#F44336"), False),
+    }
     
     def __init__(self, parent=None):
+        super().__init__(parent)
+        self.time_font = QFont("Montserrat", 9)
+        self.label_font = QFont("Montserrat", 11, QFont.Bold)
+        self.text_font = QFont("Montserrat", 11)
+        self.status_font = QFont("Montserrat", 10)
+        self.status_font.setItalic(True)
+        self.header_height = QFontMetrics(self.label_font).height()
+    
+    def _body_font(self, msg_type):
+        return self.status_font if msg_type == "status" else self.text_font
+    
+    def sizeHint(self, option, index):
+        timestamp, msg_type, message, heights = index.data(Qt.UserRole)
+        width = max(option.rect.width(), 100) - 2 * self.PADDING
+        # Wrapping is the expensive part, so remember the height per width
+        if width not in heights:
+            metrics = QFontMetrics(self._body_font(msg_type))
+            text_height = metrics.boundingRect(QRect(0, 0, width, 100000), Qt.TextWordWrap, message).height()
+            heights[width] = self.header_height + text_height + self.PADDING
+        return QSize(width + 2 * self.PADDING, heights[width])
+    
+    def paint(self, painter, option, index):
+        timestamp, msg_type, message, _ = index.data(Qt.UserRole)
+        label, label_color, text_color, _ = self.STYLES.get(msg_type, self.STYLES["status"])
+        rect = option.rect.adjusted(self.PADDING, self.PADDING // 2, -self.PADDING, -self.PADDING // 2)
+        
+        painter.save()
+        painter.setFont(self.time_font)
+        painter.setPen(QColor("#888888"))
+        time_text = f"[{timestamp}]"
+        painter.drawText(rect, Qt.AlignLeft | Qt.AlignTop, time_text)
+        x = rect.x() + QFontMetrics(self.time_font).horizontalAdvance(time_text) + 8
+        
+        if label:
+            painter.setFont(self.label_font)
+            painter.setPen(label_color)
+            painter.drawText(QRect(x, rect.y(), rect.right() - x, self.header_height), Qt.AlignLeft | Qt.AlignVCenter, label)
+        
+        painter.setFont(self._body_font(msg_type))
+        painter.setPen(text_color)
+        body = rect.adjusted(0, self.header_height, 0, 0)
+        painter.drawText(body, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, message)
+        painter.restore()
+
+class GlowingCircle(QWidget):
+    """
+    Widget that creates a glowing circle animation similar to the Jarvis logo.
+    The circle is pre-rendered into cached pixmaps, so a frame only scales and blends them.
+    """
+    # (start, end, duration in ms, easing) of each animated value
+    PULSE = (0.95, 1.05, 2000, QEasingCurve(QEasingCurve.InOutSine))
+    GLOW = (0.7, 1.0, 1500, QEasingCurve(QEasingCurve.InOutQuad))
+    
+    def __init__(self, parent=None, fps=LOGO_FPS):
         super().__init__(parent)
         self._opacity = 0.8
         self._inner_opacity = 0.9
@@ -36,88 +245,120 @@ class GlowingCircle(QWidget):
         self.setMinimumSize(120, 120)
         self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
         
-        # Setup animations
-        self.pulse_animation = QPropertyAnimation(self, b"pulseScale")
-        self.pulse_animation.setDuration(2000)
-        self.pulse_animation.setStartValue(0.95)
-        self.pulse_animation.setEndValue(1.05)
-        self.pulse_animation.setLoopCount(-1)  # Infinite loop
-        self.pulse_animation.setEasingCurve(QEasingCurve.InOutSine)
-        
-        self.glow_animation = QPropertyAnimation(self, b"opacity")
-        self.glow_animation.setDuration(1500)
-        self.glow_animation.setStartValue(0.7)
-        self.glow_animation.setEndValue(1.0)
-        self.glow_animation.setLoopCount(-1)  # Infinite loop
-        self.glow_animation.setEasingCurve(QEasingCurve.InOutQuad)
-        
-        # Start animations
-        self.pulse_animation.start()
-        self.glow_animation.start()
-        
-        # Add shadow effect
-        shadow = QGraphicsDropShadowEffect()
-        shadow.setBlurRadius(20)
-        shadow.setColor(QColor(0, 174, 255, 180))
-        shadow.setOffset(0, 0)
-        self.setGraphicsEffect(shadow)
-        
-    def paintEvent(self, event):
-        """Custom paint event to draw the glowing Jarvis circle"""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing, True)
+        self._layers = None  # (size, glow pixmap, inner pixmap)
+        self._animating = False
+        self._started = time.perf_counter()
         
-        # Calculate center and sizes
-        center_x = self.width() / 2
-        center_y = self.height() / 2
-        outer_radius = min(self.width(), self.height()) / 2 * self._pulse_scale
+        # One timer drives both values, capped at the configured frame rate
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.CoarseTimer)
+        self._timer.setInterval(max(1, int(1000 / max(fps, 1))))
+        self._timer.timeout.connect(self.advance)
+    
+    def render_layers(self):
+        """Draw the circle once at its largest pulse size; frames only scale these pixmaps"""
+        ratio = self.devicePixelRatioF()
+        side = min(self.width(), self.height()) * self.PULSE[1]
+        size = max(1, int(side * ratio))
+        center = size / 2
+        outer_radius = size / 2
         inner_radius = outer_radius * 0.8
         text_radius = inner_radius * 0.7
         
-        # Draw outer glow
-        outer_glow = QRadialGradient(center_x, center_y, outer_radius)
-        outer_glow.setColorAt(0.7, QColor(0, 174, 255, int(80 * self._opacity)))
-        outer_glow.setColorAt(0.9, QColor(0, 174, 255, int(40 * self._opacity)))
+        # Outer glow and ring, drawn at full opacity and faded per frame
+        glow = QPixmap(size, size)
+        glow.fill(Qt.transparent)
+        painter = QPainter(glow)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        outer_glow = QRadialGradient(center, center, outer_radius)
+        outer_glow.setColorAt(0.7, QColor(0, 174, 255, 80))
+        outer_glow.setColorAt(0.9, QColor(0, 174, 255, 40))
         outer_glow.setColorAt(1.0, QColor(0, 174, 255, 0))
         painter.setBrush(QBrush(outer_glow))
         painter.setPen(Qt.NoPen)
-        painter.drawEllipse(QRect(
-            int(center_x - outer_radius),
-            int(center_y - outer_radius),
-            int(outer_radius * 2),
-            int(outer_radius * 2)
-        ))
-        
-        # Draw outer circle
-        painter.setPen(QPen(QColor(0, 174, 255, int(255 * self._opacity)), 2))
-        painter.drawEllipse(QRect(
-            int(center_x - outer_radius * 0.85),
-            int(center_y - outer_radius * 0.85),
-            int(outer_radius * 1.7),
-            int(outer_radius * 1.7)
-        ))
-        
-        # Draw inner circle
-        painter.setPen(QPen(QColor(255, 255, 255, int(220 * self._inner_opacity)), 1.5))
-        painter.drawEllipse(QRect(
-            int(center_x - inner_radius),
-            int(center_y - inner_radius),
-            int(inner_radius * 2),
-            int(inner_radius * 2)
-        ))
-        
-        # Draw "JARVIS" text
-        font = QFont("Montserrat", int(text_radius * 0.4))
+        painter.drawEllipse(QRectF(center - outer_radius, center - outer_radius, outer_radius * 2, outer_radius * 2))
+        # The rings are filled with the glow too, which is what deepens the blue towards the center
+        painter.setPen(QPen(QColor(0, 174, 255, 255), 2 * ratio))
+        painter.drawEllipse(QRectF(center - outer_radius * 0.85, center - outer_radius * 0.85,
+                                   outer_radius * 1.7, outer_radius * 1.7))
+        painter.setPen(Qt.NoPen)
+        painter.drawEllipse(QRectF(center - inner_radius, center - inner_radius, inner_radius * 2, inner_radius * 2))
+        painter.end()
+        
+        # Inner circle and text, whose opacity never changes
+        inner = QPixmap(size, size)
+        inner.fill(Qt.transparent)
+        painter = QPainter(inner)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setRenderHint(QPainter.TextAntialiasing, True)
+        painter.setPen(QPen(QColor(255, 255, 255, int(220 * self._inner_opacity)), 1.5 * ratio))
+        painter.drawEllipse(QRectF(center - inner_radius, center - inner_radius, inner_radius * 2, inner_radius * 2))
+        font = QFont("Montserrat")
+        font.setPixelSize(max(1, int(text_radius * 0.4 * 4 / 3)))
         font.setBold(True)
         painter.setFont(font)
         painter.setPen(QPen(QColor(255, 255, 255, int(255 * self._inner_opacity))))
-        text_rect = QRect(
-            int(center_x - text_radius),
-            int(center_y - text_radius),
-            int(text_radius * 2),
-            int(text_radius * 2)
-        )
-        painter.drawText(text_rect, Qt.AlignCenter, "MAch")
+        painter.drawText(QRectF(center - text_radius, center - text_radius, text_radius * 2, text_radius * 2),
+                         Qt.AlignCenter, "MAch")
+        painter.end()
+        
+        # Bake the blue halo in, instead of a drop shadow effect re-blurring every frame
+        glow = self.drop_shadow(glow, 20 * ratio, QColor(0, 174, 255, 180))
+        
+        for pixmap in (glow, inner):
+            pixmap.setDevicePixelRatio(ratio)
+        self._layers = (self.size(), glow, inner)
+        return self._layers
+    
+    @staticmethod
+    def drop_shadow(pixmap, blur_radius, color):
+        """Render pixmap with a QGraphicsDropShadowEffect applied, once"""
+        scene = QGraphicsScene()
+        item = QGraphicsPixmapItem(pixmap)
+        shadow = QGraphicsDropShadowEffect()
+        shadow.setBlurRadius(blur_radius)
+        shadow.setColor(color)
+        shadow.setOffset(0, 0)
+        item.setGraphicsEffect(shadow)
+        scene.addItem(item)
+        result = QPixmap(pixmap.size())
+        result.fill(Qt.transparent)
+        painter = QPainter(result)
+        scene.render(painter, QRectF(result.rect()), QRectF(pixmap.rect()))
+        painter.end()
+        return result
+    
+    def paintEvent(self, event):
+        """Custom paint event to draw the glowing Jarvis circle"""
+        layers = self._layers
+        if layers is None or layers[0] != self.size():
+            layers = self.render_layers()
+        _, glow, inner = layers
+        
+        # Scale the cached layers to the current pulse around the center
+        side = min(self.width(), self.height()) * self._pulse_scale
+        target = QRectF((self.width() - side) / 2, (self.height() - side) / 2, side, side)
+        
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        painter.setOpacity(self._opacity)
+        painter.drawPixmap(target, glow, QRectF(glow.rect()))
+        painter.setOpacity(1.0)
+        painter.drawPixmap(target, inner, QRectF(inner.rect()))
+    
+    def advance(self):
+        """Move both animations to the current time"""
+        if not self.isVisible() or self.window().isMinimized():
+            # Nothing on screen to update; resumed from showEvent/changeEvent
+            self._timer.stop()
+            return
+        elapsed = (time.perf_counter() - self._started) * 1000
+        values = []
+        for start, end, duration, curve in (self.PULSE, self.GLOW):
+            progress = curve.valueForProgress((elapsed % duration) / duration)
+            values.append(start + (end - start) * progress)
+        self._pulse_scale, self._opacity = values
+        self.update()
         
     def get_opacity(self):
         return self._opacity
@@ -138,13 +379,40 @@ class GlowingCircle(QWidget):
     
     def start_animations(self):
         """Start all animations"""
-        self.pulse_animation.start()
-        self.glow_animation.start()
+        if not self._animating:
+            self._animating = True
+            self._started = time.perf_counter()
+        self._resume()
         
     def stop_animations(self):
-        """Stop all animations"""
-        self.pulse_animation.stop()
-        self.glow_animation.stop()
+        """Stop all animations and settle on the resting frame"""
+        self._animating = False
+        self._timer.stop()
+        self._pulse_scale = 1.0
+        self._opacity = 0.8
+        self.update()
+    
+    def _resume(self):
+        if self._animating and not self._timer.isActive() and self.isVisible() and not self.window().isMinimized():
+            self._timer.start()
+    
+    def showEvent(self, event):
+        # Minimizing only changes the window state, so watch the top-level window too
+        self.window().installEventFilter(self)
+        self._resume()
+        super().showEvent(event)
+    
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+    
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.WindowStateChange:
+            if watched.isMinimized():
+                self._timer.stop()
+            else:
+                self._resume()
+        return False
 
 class ModernButton(QPushButton):
     """Custom button with modern styling and hover effects"""
@@ -220,8 +488,10 @@ class MAchUI(QMainWindow):
     def __init__(self, comm_channel):
         super().__init__()
         self.MAch_logo = None # Late initialization
+        self._scroll_pending = False
+        self.status = None
         self.comm_channel = comm_channel
-        self.comm_channel.update_signal.connect(self.update_chat)
+        self.comm_channel.messages_signal.connect(self.update_chat_batch)
         self.comm_channel.status_signal.connect(self.update_status)
         
         # Load fonts
@@ -325,11 +595,20 @@ class MAchUI(QMainWindow):
         """)
         main_layout.addWidget(separator)
         
-        # Chat area with custom styling
-        self.chat_area = QTextEdit()
-        self.chat_area.setReadOnly(True)
+        # Chat area: a capped model painted by a delegate, so appends don't re-layout the whole log
+        self.chat_model = ChatLogModel(parent=self)
+        self.chat_area = QListView()
+        self.chat_area.setModel(self.chat_model)
+        self.chat_area.setItemDelegate(ChatMessageDelegate(self.chat_area))
+        self.chat_area.setSelectionMode(QAbstractItemView.NoSelection)
+        self.chat_area.setFocusPolicy(Qt.NoFocus)
+        self.chat_area.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.chat_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.chat_area.setWordWrap(True)
+        # Item heights depend on the width, so recompute them when the view is resized
+        self.chat_area.setResizeMode(QListView.Adjust)
         self.chat_area.setStyleSheet("""
-            QTextEdit {
+            QListView {
                 background-color: rgba(30, 35, 45, 0.7);
                 border: 1px solid rgba(60, 60, 70, 0.5);
                 border-radius: 16px;
@@ -337,7 +616,6 @@ class MAchUI(QMainWindow):
                 color: #FFFFFF;
                 font-family: 'Montserrat', 'SF Pro Display', sans-serif;
                 font-size: 15px;
-                line-height: 1.6;
             }
         """)
         
@@ -380,43 +658,50 @@ class MAchUI(QMainWindow):
         # Add welcome message
         self.update_chat("Welcome to MAch Voice Assistant. Press 'Wake MAch' to begin.", "status")
     
+    # status -> (label text, style sheet, animate logo)
+    STATUS_STYLES = {
+        "listening": ("Status: Listening...", "color: #2196F3; font-weight: bold; font-size: 16px; margin-left: 15px;", True),
+        "processing": ("Status: Processing...", "color: #FFC107; font-weight: bold; font-size: 16px; margin-left: 15px;", True),
+        "speaking": ("Status: Speaking...", "color: #9C27B0; font-weight: bold; font-size: 16px; margin-left: 15px;", True),
+        "idle": ("Status: Idle", "color: #4CAF50; font-weight: bold; font-size: 16px; margin-left: 15px;", False),
+        "error": ("Status: Error", "color: #F44336; font-weight: bold; font-size: 16px; margin-left: 15px;", False),
+    }
+    
     def update_status(self, status):
         """Update the status label and animation"""
-        if status == "listening":
-            self.status_label.setText("Status: Listening...")
-            self.status_label.setStyleSheet("color: #2196F3; font-weight: bold; font-size: 16px; margin-left: 15px;")
-            # Update logo animation
-            self.MAch_logo.start_animations()
-        elif status == "processing":
-            self.status_label.setText("Status: Processing...")
-            self.status_label.setStyleSheet("color: #FFC107; font-weight: bold; font-size: 16px; margin-left: 15px;")
+        # Restyling is costly, so skip statuses that don't change anything
+        if status == self.status or status not in self.STATUS_STYLES:
+            return
+        self.status = status
+        text, style, animate = self.STATUS_STYLES[status]
+        self.status_label.setText(text)
+        self.status_label.setStyleSheet(style)
+        # Update logo animation; it rests while idle so an idle window costs nothing
+        if animate:
             self.MAch_logo.start_animations()
-        elif status == "speaking":
-            self.status_label.setText("Status: Speaking...")
-            self.status_label.setStyleSheet("color: #9C27B0; font-weight: bold; font-size: 16px; margin-left: 15px;")
-            self.MAch_logo.start_animations()
-        elif status == "idle":
-            self.status_label.setText("Status: Idle")
-            self.status_label.setStyleSheet("color: #4CAF50; font-weight: bold; font-size: 16px; margin-left: 15px;")
-        elif status == "error":
-            self.status_label.setText("Status: Error")
-            self.status_label.setStyleSheet("color: #F44336; font-weight: bold; font-size: 16px; margin-left: 15px;")
+        else:
+            self.MAch_logo.stop_animations()
     
     def update_chat(self, message, msg_type):
         """Update the chat area with new messages"""
-        timestamp = time.strftime("%H:%M:%S")
+        self.chat_model.append(message, msg_type)
         
-        if msg_type == "user":
-            self.chat_area.append(f'<p style="margin: 12px 0; line-height: 1.5;"><span style="color: #888888; font-size: 12px; font-family: Montserrat, sans-serif;">[{timestamp}]</span> <span style="color: #4CAF50; font-weight: bold; font-family: Montserrat, sans-serif;">You:</span> <span style="color: #FFFFFF; font-family: Montserrat, sans-serif;">{message}</span></p>')
-        elif msg_type == "assistant":
-            self.chat_area.append(f'<p style="margin: 12px 0; line-height: 1.5;"><span style="color: #888888; font-size: 12px; font-family: Montserrat, sans-serif;">[{timestamp}]</span> <span style="color: #007AFF; font-weight: bold; font-family: Montserrat, sans-serif;">MAch:</span> <span style="color: #FFFFFF; font-family: Montserrat, sans-serif;">{message}</span></p>')
-        elif msg_type == "status":
-            self.chat_area.append(f'<p style="margin: 12px 0; line-height: 1.5; color: rgba(255, 255, 255, 0.7); font-style: italic; font-size: 14px; font-family: Montserrat, sans-serif;"><span style="color: #888888; font-size: 12px;">[{timestamp}]</span> {message}</p>')
-        elif msg_type == "error":
-            self.chat_area.append(f'<p style="margin: 12px 0; line-height: 1.5; color: #F44336; font-family: Montserrat, sans-serif;"><span style="color: #888888; font-size: 12px;">[{timestamp}]</span> <span style="font-weight: bold;">Error:</span> {message}</p>')
-        
-        # Scroll to the bottom
-        self.chat_area.verticalScrollBar().setValue(self.chat_area.verticalScrollBar().maximum())
+        # Scroll to the bottom once per event loop pass; scrolling forces a layout of the view
+        if not self._scroll_pending:
+            self._scroll_pending = True
+            QTimer.singleShot(0, self.scroll_chat_to_bottom)
+    
+    def update_chat_batch(self, messages):
+        """Add a batch of messages delivered by the communication channel"""
+        self.chat_model.append_many(messages)
+        if not self._scroll_pending:
+            self._scroll_pending = True
+            QTimer.singleShot(0, self.scroll_chat_to_bottom)
+    
+    def scroll_chat_to_bottom(self):
+        """Scroll the chat view to the newest message"""
+        self._scroll_pending = False
+        self.chat_area.scrollToBottom()
     
     def wake_MAch(self):
         """Wake up MAch manually"""
@@ -430,9 +715,14 @@ class MAchUI(QMainWindow):
     
     def clear_chat(self):
         """Clear the chat area"""
-        self.chat_area.clear()
+        self.chat_model.clear()
         self.update_chat("Chat cleared", "status")
     
+    def closeEvent(self, event):
+        """Make sure the chat history is on disk before exiting"""
+        self.chat_model.flush()
+        super().closeEvent(event)
+    
     def close_application(self):
         """Close the application"""
         self.comm_channel.add_message("Shutting down MAch...", "status")
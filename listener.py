@@ -0,0 +1,165 @@
+"""Long-lived microphone session with cached ambient-noise calibration"""
+import json
+import threading
+import time
+from pathlib import Path
+import speech_recognition as sr
+from decouple import config
+
+CALIBRATION_FILE = config('CALIBRATION_FILE', default=str(Path.home() / ".cache" / "mach" / "calibration.json"))
+# Recalibrate after this many seconds, or sooner if the threshold drifts
+CALIBRATION_INTERVAL = config('CALIBRATION_INTERVAL', default=600, cast=float)
+CALIBRATION_DURATION = config('CALIBRATION_DURATION', default=1, cast=float)
+# Quick refreshes are shorter than the first full calibration
+RECALIBRATION_DURATION = config('RECALIBRATION_DURATION', default=0.3, cast=float)
+# Fraction the dynamic threshold may move away from the calibrated value before recalibrating
+CALIBRATION_DRIFT = config('CALIBRATION_DRIFT', default=0.5, cast=float)
+
+
+def load_calibration(path=CALIBRATION_FILE):
+    """Return the saved (energy_threshold, calibrated_at), or None"""
+    try:
+        data = json.loads(Path(path).read_text())
+        return float(data["energy_threshold"]), float(data["calibrated_at"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class Listener:
+    """Keeps one recognizer and one open microphone for the whole session"""
+
+    def __init__(self, calibration_file=CALIBRATION_FILE):
+        self.calibration_file = Path(calibration_file)
+        self.recognizer = sr.Recognizer()
+        self.recognizer.dynamic_energy_threshold = True  # Automatically adjust for ambient noise
+        self.recognizer.energy_threshold = 4000  # Increase energy threshold for better noise filtering
+        self.recognizer.pause_threshold = 0.8  # Reduce pause threshold for faster response
+        self.recognizer.phrase_threshold = 0.3  # Minimum seconds of speaking needed
+        self.recognizer.non_speaking_duration = 0.5  # How long is silence before we stop listening
+
+        self.microphone = None
+        self.source = None
+        self.baseline = None
+        self.calibrated_at = 0
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._load_calibration()
+
+    def _load_calibration(self):
+        """Start from the threshold measured in a previous launch, if any"""
+        data = load_calibration(self.calibration_file)
+        if data:
+            self.baseline, self.calibrated_at = data
+            self.recognizer.energy_threshold = self.baseline
+
+    def _save_calibration(self):
+        try:
+            self.calibration_file.parent.mkdir(parents=True, exist_ok=True)
+            self.calibration_file.write_text(json.dumps({
+                "energy_threshold": self.baseline,
+                "calibrated_at": self.calibrated_at
+            }))
+        except OSError as e:
+            print(f"Could not save calibration: {str(e)}")
+
+    def open(self):
+        """Open the microphone once and keep it open"""
+        if self.source is None:
+            self.microphone = sr.Microphone()
+            self.source = self.microphone.__enter__()
+        return self.source
+
+    def close(self):
+        """Release the microphone"""
+        with self._lock:
+            self._release()
+
+    def _release(self):
+        if self.source is not None:
+            try:
+                self.microphone.__exit__(None, None, None)
+            except Exception as e:
+                print(f"Error closing microphone: {str(e)}")
+            finally:
+                self.microphone = None
+                self.source = None
+
+    def needs_calibration(self):
+        """Calibrate when there is no baseline, it is stale, or the threshold has drifted"""
+        if self.baseline is None:
+            return True
+        if time.time() - self.calibrated_at > CALIBRATION_INTERVAL:
+            return True
+        drift = abs(self.recognizer.energy_threshold - self.baseline) / max(self.baseline, 1)
+        return drift > CALIBRATION_DRIFT
+
+    def calibrate(self, duration=None):
+        """Measure ambient noise and persist the resulting threshold"""
+        if duration is None:
+            duration = CALIBRATION_DURATION if self.baseline is None else RECALIBRATION_DURATION
+        print("Adjusting for ambient noise...")
+        self.recognizer.adjust_for_ambient_noise(self.open(), duration=duration)
+        self.baseline = self.recognizer.energy_threshold
+        self.calibrated_at = time.time()
+        self._save_calibration()
+
+    def start_background_calibration(self, is_quiet, interval=30):
+        """
+        Refresh a stale or drifted threshold between turns so listen() rarely has to.
+        is_quiet() should return False while the assistant is talking.
+        """
+        if self._refresher is not None:
+            return
+
+        def refresh():
+            while True:
+                time.sleep(interval)
+                if not is_quiet() or not self.needs_calibration():
+                    continue
+                # Skip this round if a turn is currently using the microphone
+                if not self._lock.acquire(blocking=False):
+                    continue
+                try:
+                    self.calibrate(RECALIBRATION_DURATION)
+                except Exception as e:
+                    print(f"Background calibration failed: {str(e)}")
+                    self._release()
+                finally:
+                    self._lock.release()
+
+        self._refresher = threading.Thread(target=refresh, name="mic-calibration", daemon=True)
+        self._refresher.start()
+
+    def listen(self, timeout=7, phrase_time_limit=10):
+        """
+        Capture one phrase, calibrating first only when needed.
+        Returns the audio and a per-stage latency breakdown in seconds.
+        """
+        timings = {"mic_open": 0.0, "calibration": 0.0, "capture": 0.0}
+        with self._lock:
+            try:
+                started = time.perf_counter()
+                source = self.open()
+                timings["mic_open"] = time.perf_counter() - started
+                if self.needs_calibration():
+                    started = time.perf_counter()
+                    self.calibrate()
+                    timings["calibration"] = time.perf_counter() - started
+
+                started = time.perf_counter()
+                try:
+                    audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+                finally:
+                    timings["capture"] = time.perf_counter() - started
+            except sr.WaitTimeoutError:
+                raise
+            except Exception:
+                # Reopen the device on the next turn
+                self._release()
+                raise
+        return audio, timings
+
+
+def format_turn_timings(timings):
+    """Format a turn's latency breakdown for logging"""
+    return ", ".join(f"{stage}: {seconds * 1000:.0f} ms" for stage, seconds in timings.items())
@@ -1,12 +1,9 @@
-import requests
-from functions.online_ops import find_my_ip, get_latest_news, get_random_advice, get_random_joke, get_trending_movies, get_weather_report, play_on_youtube, search_on_google, search_on_wikipedia, send_email, send_whatsapp_message
-from functions.school_ops import school_mode
 import speech_recognition as sr
 from decouple import config
 from datetime import datetime
 from functions.os_ops import open_calculator, open_camera, open_cmd, open_notepad, open_discord, open_application
 from random import choice
-from utils import opening_text, conversation_responses
+from utils import opening_text, conversation_responses, convenience_text
 from pprint import pprint
 import os
 from pathlib import Path
@@ -14,14 +11,34 @@ import webbrowser
 import re
 import threading
 import sys
-from PyQt5.QtWidgets import QApplication
-from jarvis_ui import launch_ui
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from speech import get_tts_cache, SpeechServiceError
+from tts_cache import warm_up
+from speech_queue import SpeechQueue, PRIORITY_NORMAL
+from tts import ELEVENLABS_BASE_URL, pause_playback, resume_playback
+from sources import make_input_source, StdinSource, INPUT_SOURCE
+from sinks import make_output_sink, TTSSink, OUTPUT_SINK
+from listener import Listener, load_calibration, format_turn_timings
+from capture import ContinuousCapture, EnergyVAD, CAPTURE_MODE, BARGE_IN
+from recognizers import RecognizerChain
+from wake_word import WakeWordListener, WakeWordDetector, WAKE_WORD_ENABLED
+from intents import IntentRouter
+from weather import WeatherCache, WEATHER_LOCATION, WEATHER_DEADLINE, unknown_weather
+from startup import StartupTimeline
+from acknowledgements import Acknowledger
+from tracing import tracer
+import turn_scope
+import http_session
 import json
 from urllib.request import urlopen
 
 USERNAME = config('USER', default='Sir')
 BOTNAME = config('BOTNAME', default='MAch')
 ELEVENLABS_API_KEY = config('ELEVENLABS_API_KEY', default='')
+# Run without the Qt window, controlled over the local HTTP API in control.py
+HEADLESS = config('HEADLESS', default=False, cast=bool)
 
 # Set ElevenLabs API key
 os.environ["ELEVEN_API_KEY"] = ELEVENLABS_API_KEY
@@ -29,10 +46,45 @@ os.environ["ELEVEN_API_KEY"] = ELEVENLABS_API_KEY
 # Global variables
 running = False
 comm_channel = None
+listener = None
+speech_to_text = None
+capture = None
+# The wake word thread and the startup "microphone" phase may both ask for these first
+_microphone_lock = threading.Lock()
+input_source = None  # None listens to the microphone, see sources.py
+# Answers typed at console prompts; one reader thread for the whole process, so a prompt
+# abandoned by Stop doesn't hold an executor worker or take the next session's line
+console = None
+_console_lock = threading.Lock()
+output_sink = TTSSink()  # see sinks.py
+intent_router = IntentRouter()
+weather_cache = WeatherCache()
+speech_queue = SpeechQueue(lambda text: play_utterance(text), stop=lambda: output_sink.stop())
+# Says an opening_text line when a handler goes quiet for longer than usual
+acknowledger = Acknowledger(say=lambda text: speech_queue.say(text), is_quiet=lambda: speech_queue.pending() == 0)
 
-def speak(text):
+# Assistant sessions run as tasks on an asyncio loop with its own thread, so Stop can cancel them
+assistant_loop = None
+assistant_session_future = None
+session_id = 0
+_session_local = threading.local()
+# Blocking stages (microphone, recognition, handlers) run here; a cancelled turn's
+# thread is abandoned and winds down in the background
+blocking_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="assistant")
+
+def speak(text, priority=PRIORITY_NORMAL):
+    """
+    Queue text to be spoken without blocking the caller.
+    Returns a future that completes once the utterance has been played.
     """
-    Text to speech using ElevenLabs API
+    # A handler still finishing after Stop must not start talking again
+    check_session()
+    acknowledger.output()
+    return speech_queue.say(text, priority)
+
+def play_utterance(text):
+    """
+    Text to speech through the output sink (ElevenLabs by default), run on the speech queue's worker thread
     """
     # Update UI status to speaking
     if comm_channel:
@@ -42,101 +94,133 @@ def speak(text):
     try:
         print(f"Generating speech for: {text}")
         
-        # Create API endpoint URL
-        url = "https://api.elevenlabs.io/v1/text-to-speech/pNInz6obpgDQGcFmaJgB"  # Adam's voice ID
-        
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": ELEVENLABS_API_KEY
-        }
-        
-        data = {
-            "text": text,
-            "model_id": "eleven_monolingual_v1",
-            "voice_settings": {
-                "stability": 0.71,
-                "similarity_boost": 0.5
-            }
-        }
-        
-        print("Requesting audio from ElevenLabs...")
-        response = requests.post(url, json=data, headers=headers)
-        
-        if response.status_code == 200:
-            # Save audio to file
-            temp_file = "temp_audio.mp3"
-            with open(temp_file, "wb") as f:
-                f.write(response.content)
-            
-            # Play the audio using mpg123
-            print("Playing audio...")
-            os.system(f'mpg123 "{temp_file}"')
-            
-            # Clean up
-            os.remove(temp_file)
-        else:
-            print(f"Error from ElevenLabs API: {response.status_code}")
-            print(response.text)
-            if comm_channel:
-                comm_channel.add_message(f"Error from speech service: {response.status_code}", "error")
-            
+        # Long answers are split into sentences that are synthesized while earlier ones play
+        output_sink.say(text)
+    
+    except SpeechServiceError as e:
+        print(f"Error from ElevenLabs API: {e.status_code}")
+        print(e.body)
+        if comm_channel:
+            comm_channel.add_message(f"Error from speech service: {e.status_code}", "error")
     except Exception as e:
         print(f"Error with ElevenLabs: {str(e)}")
         print(f"Assistant: {text}")
         if comm_channel:
             comm_channel.add_message(f"Speech error: {str(e)}", "error")
     
-    # Set status back to idle or listening
-    if comm_channel:
+    # Set status back to idle or listening once nothing else is waiting to be spoken
+    if comm_channel and speech_queue.pending() <= 1:
         if running:
             comm_channel.update_status("listening")
         else:
             comm_channel.update_status("idle")
 
+def get_listener():
+    """Create the shared microphone session on first use"""
+    global listener
+    if listener is None:
+        with _microphone_lock:
+            if listener is None:
+                listener = Listener()
+                listener.start_background_calibration(lambda: speech_queue.pending() == 0)
+    return listener
+
+def get_capture():
+    """Start the always-on capture thread on first use"""
+    global capture
+    if capture is None:
+        with _microphone_lock:
+            if capture is None:
+                calibration = load_calibration()
+                if BARGE_IN:
+                    # Talking over the assistant cuts it off and the utterance is kept
+                    new_capture = ContinuousCapture(vad=EnergyVAD(calibration[0] if calibration else None),
+                                                    on_speech_start=speech_queue.cancel_all)
+                else:
+                    # Anything heard while the assistant is talking is its own voice
+                    new_capture = ContinuousCapture(vad=EnergyVAD(calibration[0] if calibration else None),
+                                                    should_discard=lambda: speech_queue.pending() > 0)
+                new_capture.start()
+                # Published only once it is running, so other threads never read from an unopened source
+                capture = new_capture
+    return capture
+
+def init_microphone():
+    """Open the microphone ahead of the first turn"""
+    if CAPTURE_MODE == "continuous":
+        get_capture()
+    else:
+        # Calibration waits for the first turn so it doesn't measure the greeting
+        get_listener().open()
+
+def get_speech_to_text():
+    """Create the speech recognition backend chain on first use"""
+    global speech_to_text
+    if speech_to_text is None:
+        speech_to_text = RecognizerChain()
+    return speech_to_text
+
 def take_user_input():
     """Takes user input, recognizes it using Speech Recognition module and converts it into text"""
+    # A handler waiting for the user's answer is not running late
+    with acknowledger.waiting_for_user():
+        return listen_for_query()
+
+def listen_for_query():
+    # Don't listen while the assistant is still talking, or it will hear itself
+    speech_queue.wait_idle()
+    check_session()
     
     if comm_channel:
         comm_channel.update_status("listening")
+    tracer.new_turn()
+    
+    if input_source is not None:
+        return read_text_input()
     
-    r = sr.Recognizer()
     try:
-        with sr.Microphone() as source:
-            print('Listening....')
-            # Adjust the recognizer sensitivity to ambient noise
-            r.dynamic_energy_threshold = True  # Automatically adjust for ambient noise
-            r.energy_threshold = 4000  # Increase energy threshold for better noise filtering
-            r.pause_threshold = 0.8  # Reduce pause threshold for faster response
-            r.phrase_threshold = 0.3  # Minimum seconds of speaking needed
-            r.non_speaking_duration = 0.5  # How long is silence before we stop listening
-            
-            # Adjust microphone for ambient noise
-            print("Adjusting for ambient noise...")
-            r.adjust_for_ambient_noise(source, duration=1)
-            
-            try:
-                print("Now listening...")
-                # Increased timeout and phrase time limit
-                audio = r.listen(source, 
-                               timeout=7,  # Wait longer for speech to start
-                               phrase_time_limit=10,  # Allow longer phrases
-                               )
-            except sr.WaitTimeoutError:
-                speak("I didn't hear anything. Could you please speak again, sir?")
-                return "timeout"
+        print('Listening....')
+        listen_started = time.perf_counter()
+        try:
+            print("Now listening...")
+            if CAPTURE_MODE == "continuous":
+                # The capture thread has been recording all along; take the next utterance it cut
+                started = time.perf_counter()
+                try:
+                    audio = get_capture().next_utterance(timeout=7, cancelled=in_stale_session)
+                finally:
+                    timings = {"capture": time.perf_counter() - started}
+            else:
+                # Calibration only runs when the cached threshold is missing, stale or has drifted
+                audio, timings = get_listener().listen(timeout=7,  # Wait longer for speech to start
+                                                       phrase_time_limit=10,  # Allow longer phrases
+                                                       )
+        except sr.WaitTimeoutError:
+            check_session()
+            speak("I didn't hear anything. Could you please speak again, sir?")
+            return "timeout"
             
         try:
+            check_session()
             if comm_channel:
                 comm_channel.update_status("processing")
                 
             print('Recognizing...')
-            # Use a more accurate recognition setting
-            query = r.recognize_google(audio, 
-                                    language='en-in',
-                                    show_all=False)  # Get the most confident result
+            started = time.perf_counter()
+            try:
+                # Configured backends are tried in order, e.g. Google first, then offline Vosk
+                query = get_speech_to_text().recognize(audio)
+            finally:
+                timings["recognition"] = time.perf_counter() - started
+                print(f"Turn latency - {format_turn_timings(timings)}")
+                # The stages run back to back, so each span starts where the previous one ended
+                offset = listen_started
+                for stage, seconds in timings.items():
+                    tracer.record(stage, offset, seconds)
+                    offset += seconds
             print(f'User said: {query}\n')
             
+            check_session()
             if comm_channel:
                 comm_channel.add_message(query, "user")
                 
@@ -150,147 +234,117 @@ def take_user_input():
     except KeyboardInterrupt:
         print("\nStopping voice assistant...")
         return "exit"
+    except TurnCancelled:
+        raise
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         if comm_channel:
             comm_channel.add_message(f"Input error: {str(e)}", "error")
         return "none"
 
-def get_reliable_weather(location="Leander,Texas"):
-    """Get weather data using a more reliable free API for a specific location"""
+def read_text_input():
+    """Take the next query from a text input source instead of the microphone"""
+    deadline = time.monotonic() + 7
+    query = None
     try:
-        # Using wttr.in which is more reliable and doesn't require API keys
-        # Encode the location for URL
-        encoded_location = location.replace(" ", "+")
-        response = requests.get(f"https://wttr.in/{encoded_location}?format=j1", timeout=10)
-        
-        if response.status_code == 200:
-            weather_data = response.json()
-            current = weather_data["current_condition"][0]
-            
-            # Extract the data we need
-            weather_desc = current["weatherDesc"][0]["value"]
-            temp_c = current["temp_C"]
-            temp_f = current["temp_F"]  # Adding Fahrenheit for US locations
-            feels_like = current["FeelsLikeF"] + "°F"  # Using Fahrenheit for US
-            
-            # Get location info
-            location = weather_data["nearest_area"][0]
-            city = location["areaName"][0]["value"]
-            region = location["region"][0]["value"]
-            country = location["country"][0]["value"]
-            
-            return {
-                "success": True,
-                "city": city,
-                "region": region,
-                "country": country,
-                "weather": weather_desc,
-                "temperature": f"{temp_f}°F",
-                "feels_like": feels_like
-            }
-    except Exception as e:
-        print(f"Weather API error: {str(e)}")
-    
-    # Fallback to another API if the first one fails
-    try:
-        # Using another free API as backup
-        response = requests.get(f"https://goweather.herokuapp.com/weather/{location}", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "success": True,
-                "city": "Leander",
-                "region": "Texas",
-                "country": "United States",
-                "weather": data.get("description", "unknown"),
-                "temperature": data.get("temperature", "unknown"),
-                "feels_like": data.get("temperature", "unknown")  # This API doesn't provide feels like
-            }
-    except Exception as e:
-        print(f"Backup weather API error: {str(e)}")
+        # Short reads, so a turn cancelled by Stop doesn't swallow the next line
+        while query is None and time.monotonic() < deadline and not in_stale_session():
+            query = input_source.read(timeout=0.1)
+    except EOFError:
+        return "exit"
+    if query is not None and in_stale_session():
+        input_source.unread(query)
+    check_session()
+    if query is None:
+        return "timeout"
+    print(f'User said: {query}\n')
     
-    # Return default values if all APIs fail
-    return {
-        "success": False,
-        "city": "Leander",
-        "region": "Texas",
-        "country": "United States",
-        "weather": "unknown",
-        "temperature": "unknown",
-        "feels_like": "unknown"
-    }
-
-def greet_user():
+    if comm_channel:
+        comm_channel.add_message(query, "user")
+    return query.lower()
+
+def get_console():
+    """Start reading the console on first use; a text input source answers prompts itself"""
+    global console
+    if console is None:
+        with _console_lock:
+            if console is None:
+                console = input_source or StdinSource()
+    return console
+
+def read_console(prompt):
+    """Like input(), but gives up when Stop abandons the turn; returns "exit" once the console closes"""
+    print(prompt, end="", flush=True)
+    answer = None
+    # A handler waiting for the user's answer is not running late
+    with acknowledger.waiting_for_user():
+        try:
+            while answer is None and not in_stale_session():
+                answer = get_console().read(timeout=0.1)
+        except EOFError:
+            answer = "exit"
+    if answer is not None and answer != "exit" and in_stale_session():
+        # Stopped while the line was arriving; it belongs to the next session
+        get_console().unread(answer)
+    check_session()
+    return answer
+
+def warm_acknowledgements():
+    """Render the opening_text lines into the speech cache so acknowledgements play instantly"""
+    cache = get_tts_cache()
+    if cache and ELEVENLABS_API_KEY:
+        warm_up(cache, opening_text)
+
+def get_reliable_weather(location=WEATHER_LOCATION):
+    """Get weather data for a location, answered from the cache whenever possible"""
+    return weather_cache.get(location)
+
+def greet_user(startup=None):
     """Greets the user according to the time and provides weather information"""
     hour = datetime.now().hour
     current_time = datetime.now().strftime("%I:%M %p")
     
-    # Get weather information using our reliable function
-    weather_data = get_reliable_weather("Leander,Texas")
-    
-    if weather_data["success"]:
-        weather_info = f"The current temperature in {weather_data['city']}, {weather_data['region']} is {weather_data['temperature']}, and it feels like {weather_data['feels_like']}. The weather is {weather_data['weather']}."
-    else:
-        weather_info = "I apologize, but I couldn't fetch the weather information for Leander, Texas at the moment."
-    
+    # Say the greeting right away; the weather follows as soon as it is ready
     # Morning greeting
     if hour >= 0 and hour < 12:
-        speak(f"Good morning {USERNAME} Sir! The time is {current_time}. {weather_info}")
+        speak(f"Good morning {USERNAME} Sir! The time is {current_time}.")
     # Afternoon greeting
     elif hour >= 12 and hour < 16:
-        speak(f"Good afternoon {USERNAME} Sir! The time is {current_time}. {weather_info}")
+        speak(f"Good afternoon {USERNAME} Sir! The time is {current_time}.")
     # Evening greeting
     elif hour >= 16 and hour < 19:
-        speak(f"Good evening {USERNAME} Sir! The time is {current_time}. {weather_info}")
+        speak(f"Good evening {USERNAME} Sir! The time is {current_time}.")
     # Night greeting
     else:
-        speak(f"Good night {USERNAME} Sir! The time is {current_time}. {weather_info}")
+        speak(f"Good night {USERNAME} Sir! The time is {current_time}.")
     
-    speak("How may I assist you today?")
-
-def handle_conversation(query):
-    """Handles conversational queries that don't require specific actions"""
+    # Get weather information, usually already fetched by the startup phase
+    if startup:
+        weather_data = startup.result("weather", timeout=WEATHER_DEADLINE, default=None) or unknown_weather()
+    else:
+        weather_data = get_reliable_weather()
     
-    # Check for greetings
-    if any(phrase in query for phrase in ["hello", "hi", "hey", "greetings"]):
-        speak(choice(conversation_responses["greetings"]))
-        return True
-        
-    # Check for how are you type questions
-    elif any(phrase in query for phrase in ["how are you", "how's it going", "how do you do", "how are things"]):
-        speak(choice(conversation_responses["how_are_you"]))
-        return True
-        
-    # Check for what can you do questions
-    elif any(phrase in query for phrase in ["what can you do", "help me", "your abilities", "your features"]):
-        speak(choice(conversation_responses["capabilities"]))
-        return True
-        
-    # Check for thank you responses
-    elif any(phrase in query for phrase in ["thank you", "thanks", "appreciate it"]):
-        speak(choice(conversation_responses["thanks"]))
-        return True
-        
-    # Check for who are you questions
-    elif any(phrase in query for phrase in ["who are you", "what are you", "what's your name"]):
-        speak(choice(conversation_responses["identity"]).format(BOTNAME=BOTNAME, USERNAME=USERNAME))
-        return True
-        
-    # Check for time-related questions
-    elif any(phrase in query for phrase in ["what time is it", "what's the time", "tell me the time"]):
-        current_time = datetime.now().strftime("%I:%M %p")
-        speak(f"The current time is {current_time}, sir.")
-        return True
-        
-    # Check for date-related questions
-    elif any(phrase in query for phrase in ["what date is it", "what's the date", "tell me the date"]):
-        current_date = datetime.now().strftime("%A, %B %d, %Y")
-        speak(f"Today is {current_date}, sir.")
-        return True
+    if weather_data["success"]:
+        weather_info = f"The current temperature in {weather_data['city']}, {weather_data['region']} is {weather_data['temperature']}, and it feels like {weather_data['feels_like']}. The weather is {weather_data['weather']}."
+    else:
+        weather_info = "I apologize, but I couldn't fetch the weather information for Leander, Texas at the moment."
     
-    # If no conversational patterns matched
-    return False
+    speak(weather_info)
+    speak("How may I assist you today?")
+
+def handle_small_talk(response_key):
+    """Build a handler that answers with a random canned response"""
+    def handler(query):
+        speak(choice(conversation_responses[response_key]).format(BOTNAME=BOTNAME, USERNAME=USERNAME))
+    return handler
+
+def handle_time(query):
+    current_time = datetime.now().strftime("%I:%M %p")
+    speak(f"The current time is {current_time}, sir.")
+
+def handle_date(query):
+    current_date = datetime.now().strftime("%A, %B %d, %Y")
+    speak(f"Today is {current_date}, sir.")
 
 def extract_app_name(query):
     """Extract application name from the query"""
@@ -302,215 +356,406 @@ def extract_app_name(query):
         return app_name.strip()
     return None
 
+def handle_school_mode(query):
+    speak("Activating school mode. I'll check your emails and Google Classroom assignments.")
+    # The Google API clients are only loaded the first time school mode is used, while the line above plays
+    from functions.school_ops import school_mode
+    result = school_mode()
+    
+    if result['success']:
+        speak(f"I found {result['email_count']} new emails and {result['assignment_count']} pending assignments.")
+        speak("I've created a detailed summary document for you.")
+        speak("Would you like me to open the document?")
+        
+        response = take_user_input()
+        if response and ("yes" in response.lower() or "sure" in response.lower() or "okay" in response.lower()):
+            webbrowser.open(result['doc_url'])
+            speak("I've opened the summary document in your browser.")
+    else:
+        speak(f"I encountered an error: {result['error']}")
+        speak("Please make sure you have set up your Google credentials correctly.")
+
+def handle_open_notepad(query):
+    speak("Opening Notepad for you.")
+    open_notepad()
+
+def handle_open_discord(query):
+    speak("Opening Discord for you.")
+    open_discord()
+
+def handle_open_cmd(query):
+    speak("Opening Command Prompt for you.")
+    open_cmd()
+
+def handle_open_camera(query):
+    speak("Opening Camera for you.")
+    open_camera()
+
+def handle_open_calculator(query):
+    speak("Opening Calculator for you.")
+    open_calculator()
+
+def handle_open_app(query):
+    # General app opening functionality
+    from functions.online_ops import search_on_google
+    app_name = extract_app_name(query)
+    if not app_name:
+        # Nothing to open after all; answer rather than end the turn in silence
+        return handle_unknown(query)
+    speak(f"Opening {app_name} for you, sir.")
+    success = open_application(app_name)
+    if not success:
+        speak(f"I couldn't find the application {app_name}. Would you like me to search for it online?")
+        response = take_user_input()
+        if response and ("yes" in response.lower() or "sure" in response.lower()):
+            search_on_google(f"{app_name} download mac")
+            speak(f"I've searched for {app_name} online for you.")
+
+def handle_ip_address(query):
+    from functions.online_ops import find_my_ip
+    ip_address = find_my_ip()
+    speak(f'Your IP Address is {ip_address}.\n For your convenience, I am printing it on the screen sir.')
+    print(f'Your IP Address is {ip_address}')
+
+def handle_wikipedia(query):
+    from functions.online_ops import search_on_wikipedia
+    speak('What do you want to search on Wikipedia, sir?')
+    search_query = take_user_input().lower()
+    if search_query not in ["none", "timeout", "exit"]:
+        results = search_on_wikipedia(search_query)
+        speak(f"According to Wikipedia, {results}")
+        speak(convenience_text)
+        print(results)
+
+def handle_youtube(query):
+    from functions.online_ops import play_on_youtube
+    speak('What do you want to play on Youtube, sir?')
+    video = take_user_input().lower()
+    if video not in ["none", "timeout", "exit"]:
+        play_on_youtube(video)
+
+def handle_google_search(query):
+    from functions.online_ops import search_on_google
+    speak('What do you want to search on Google, sir?')
+    search_query = take_user_input().lower()
+    if search_query not in ["none", "timeout", "exit"]:
+        search_on_google(search_query)
+
+def handle_whatsapp(query):
+    from functions.online_ops import send_whatsapp_message
+    speak('On what number should I send the message sir? Please enter in the console: ')
+    number = read_console("Enter the number: ")
+    if number == "exit":
+        return
+    speak("What is the message sir?")
+    message = take_user_input().lower()
+    if message not in ["none", "timeout", "exit"]:
+        send_whatsapp_message(number, message)
+        speak("I've sent the message sir.")
+
+def handle_email(query):
+    from functions.online_ops import send_email
+    speak("On what email address do I send sir? Please enter in the console: ")
+    receiver_address = read_console("Enter email address: ")
+    if receiver_address == "exit":
+        return
+    speak("What should be the subject sir?")
+    subject = take_user_input().capitalize()
+    if subject.lower() not in ["none", "timeout", "exit"]:
+        speak("What is the message sir?")
+        message = take_user_input().capitalize()
+        if message.lower() not in ["none", "timeout", "exit"]:
+            if send_email(receiver_address, subject, message):
+                speak("I've sent the email sir.")
+            else:
+                speak("Something went wrong while I was sending the mail. Please check the error logs sir.")
+
+def speak_fetch_timeout():
+    speak("Sorry sir, that is taking too long to fetch right now. Please try again in a moment.")
+
+def handle_joke(query):
+    from functions.online_ops import get_random_joke
+    # Fetch while the intro is being spoken
+    turn_scope.submit(get_random_joke)
+    speak(f"Hope you like this one sir")
+    try:
+        joke = turn_scope.fetch(get_random_joke)
+    except turn_scope.FetchTimeout:
+        return speak_fetch_timeout()
+    speak(joke)
+    speak(convenience_text)
+    pprint(joke)
+
+def handle_advice(query):
+    from functions.online_ops import get_random_advice
+    turn_scope.submit(get_random_advice)
+    speak(f"Here's an advice for you, sir")
+    try:
+        advice = turn_scope.fetch(get_random_advice)
+    except turn_scope.FetchTimeout:
+        return speak_fetch_timeout()
+    speak(advice)
+    speak(convenience_text)
+    pprint(advice)
+
+def handle_trending_movies(query):
+    from functions.online_ops import get_trending_movies
+    try:
+        movies = turn_scope.fetch(get_trending_movies)
+    except turn_scope.FetchTimeout:
+        return speak_fetch_timeout()
+    speak(f"Some of the trending movies are: {movies}")
+    speak(convenience_text)
+    print(*movies, sep='\n')
+
+def handle_news(query):
+    from functions.online_ops import get_latest_news
+    turn_scope.submit(get_latest_news)
+    speak(f"I'm reading out the latest news headlines, sir")
+    try:
+        news = turn_scope.fetch(get_latest_news)
+    except turn_scope.FetchTimeout:
+        return speak_fetch_timeout()
+    speak(news)
+    speak(convenience_text)
+    print(*news, sep='\n')
+
+def handle_weather(query):
+    weather_data = get_reliable_weather()
+    
+    if weather_data["success"]:
+        speak(f"Getting weather report for {weather_data['city']}, {weather_data['region']}")
+        speak(f"The current temperature is {weather_data['temperature']}, but it feels like {weather_data['feels_like']}")
+        speak(f"Also, the weather report talks about {weather_data['weather']}")
+        speak(convenience_text)
+        print(f"Location: {weather_data['city']}, {weather_data['region']}, {weather_data['country']}")
+        print(f"Description: {weather_data['weather']}")
+        print(f"Temperature: {weather_data['temperature']}")
+        print(f"Feels like: {weather_data['feels_like']}")
+    else:
+        speak("I apologize, but I couldn't fetch the weather information for Leander, Texas at the moment.")
+        speak("This might be due to network issues or API limitations.")
+
+def handle_unknown(query):
+    # If no specific command matched, try to provide a helpful response
+    from functions.online_ops import search_on_google
+    speak("I'm not sure how to help with that. Would you like me to search for information about it online?")
+    response = take_user_input()
+    if response and ("yes" in response.lower() or "sure" in response.lower()):
+        search_on_google(query)
+        speak(f"I've searched for information about '{query}' online for you.")
+
+# Intent name (see intents.INTENTS) -> handler
+INTENT_HANDLERS = {
+    "greetings": handle_small_talk("greetings"),
+    "how_are_you": handle_small_talk("how_are_you"),
+    "capabilities": handle_small_talk("capabilities"),
+    "thanks": handle_small_talk("thanks"),
+    "identity": handle_small_talk("identity"),
+    "time": handle_time,
+    "date": handle_date,
+    "school_mode": handle_school_mode,
+    "open_notepad": handle_open_notepad,
+    "open_discord": handle_open_discord,
+    "open_cmd": handle_open_cmd,
+    "open_camera": handle_open_camera,
+    "open_calculator": handle_open_calculator,
+    "open_app": handle_open_app,
+    "ip_address": handle_ip_address,
+    "wikipedia": handle_wikipedia,
+    "youtube": handle_youtube,
+    "google_search": handle_google_search,
+    "whatsapp": handle_whatsapp,
+    "email": handle_email,
+    "joke": handle_joke,
+    "advice": handle_advice,
+    "trending_movies": handle_trending_movies,
+    "news": handle_news,
+    "weather": handle_weather,
+}
+
+def route(query):
+    """Intent name for a query: "exit", a key of INTENT_HANDLERS, or None when nothing matched"""
+    # One pass over every intent phrase, highest priority match wins
+    return "exit" if query == "exit" else intent_router.match(query)
+
+def dispatch(intent, query):
+    """Run the handler for a routed query"""
+    # Fetches are shared within this query and start fresh for the next one
+    turn_scope.new_turn()
+    handler = INTENT_HANDLERS.get(intent, handle_unknown)
+    turn = acknowledger.begin(intent)
+    try:
+        handler(query)
+    except TurnCancelled:
+        # Stopped mid-turn; the rest of the handler is abandoned before any side effect
+        print(f"Abandoned the '{intent or 'unknown'}' turn after Stop")
+    finally:
+        acknowledger.end(turn, record=not in_stale_session())
+
+def get_assistant_loop():
+    """Start the asyncio loop that runs assistant sessions on first use"""
+    global assistant_loop
+    if assistant_loop is None:
+        assistant_loop = asyncio.new_event_loop()
+        threading.Thread(target=assistant_loop.run_forever, name="assistant-loop", daemon=True).start()
+    return assistant_loop
+
+async def run_blocking(fn, *args):
+    """Await a blocking call on the executor, tagged with the session it belongs to"""
+    session = session_id
+    
+    def call():
+        _session_local.session = session
+        try:
+            return fn(*args)
+        finally:
+            _session_local.session = None
+    
+    return await asyncio.get_running_loop().run_in_executor(blocking_executor, call)
+
+def in_stale_session():
+    """True on a thread still finishing work for a session that has been stopped"""
+    session = getattr(_session_local, "session", None)
+    return session is not None and (session != session_id or not running)
+
+class TurnCancelled(Exception):
+    """Raised on a thread still working for a session that has been stopped"""
+
+def check_session():
+    """Abandon the current turn if its session has been stopped"""
+    if in_stale_session():
+        raise TurnCancelled()
+
 def start_assistant():
-    """Start the assistant in a separate thread"""
-    global running
+    """Start an assistant session on the assistant event loop"""
+    global running, session_id, assistant_session_future
     if running:
         return  # Already running
         
     running = True
-    thread = threading.Thread(target=assistant_thread)
-    thread.daemon = True  # Make thread exit when main program exits
-    thread.start()
+    session_id += 1
+    assistant_session_future = asyncio.run_coroutine_threadsafe(assistant_session(), get_assistant_loop())
 
 def stop_assistant():
-    """Stop the assistant"""
+    """Stop the assistant, cancelling the turn in progress"""
     global running
     running = False
+    # Whatever the session is awaiting (listening, recognition, a handler) is abandoned at once
+    if assistant_session_future:
+        assistant_session_future.cancel()
+    acknowledger.cancel()
+    # Barge-in: drop queued speech and cut off the current utterance
+    speech_queue.cancel_all()
     if comm_channel:
         comm_channel.update_status("idle")
         comm_channel.add_message("Assistant stopped", "status")
 
-def assistant_thread():
-    """Main assistant thread that handles voice commands"""
+def wait_until_stopped(timeout=None):
+    """Block until the session has finished and nothing is left to say"""
+    if assistant_session_future:
+        try:
+            assistant_session_future.result(timeout)
+        except Exception:
+            pass
+    return speech_queue.wait_idle(timeout)
+
+def on_wake_word():
+    """Start the assistant when "Hey MAch" is heard"""
+    if comm_channel:
+        comm_channel.add_message("Wake word detected", "status")
+    start_assistant()
+
+def start_wake_word_listener():
+    """Spot the wake word locally while the assistant is idle"""
+    if not WAKE_WORD_ENABLED or CAPTURE_MODE != "continuous":
+        return
+    # Only open the microphone once there is a model to spot the wake word with
+    detector = WakeWordDetector()
+    try:
+        detector.load()
+    except sr.RequestError as e:
+        print(f"Wake word disabled: {str(e)}")
+        return
+    listener = WakeWordListener(get_capture(), on_wake=on_wake_word, is_idle=lambda: not running,
+                                detector=detector)
+    listener.start()
+
+async def assistant_session():
+    """Main assistant loop that handles voice commands; cancelled by stop_assistant()"""
     global running
     
     if comm_channel:
         comm_channel.add_message("Starting MAch...", "status")
     
-    greet_user()
+    # Whatever was said while idle was not meant for this session
+    if capture is not None:
+        capture.clear()
     
-    while running:
-        try:
-            query = take_user_input()
-            
-            # Check if we should exit
-            if query == "exit" or "stop" in query:
-                speak("Goodbye! Have a great day!")
-                running = False
-                break
-                
-            # Skip if no valid input
-            elif query == "none" or query == "timeout":
-                continue
+    # Fetch the weather, warm up speech and open the microphone at the same time
+    startup = StartupTimeline()
+    startup.run("weather", get_reliable_weather)
+    startup.run("tts connection", http_session.warm_up, ELEVENLABS_BASE_URL)
+    startup.run("tts cache", get_tts_cache)
+    startup.run("acknowledgements", warm_acknowledgements)
+    if input_source is None:
+        startup.run("microphone", init_microphone)
+        startup.run("speech recognition", lambda: get_speech_to_text().warm_up())
+    
+    try:
+        await run_blocking(greet_user, startup)
+        
+        # The first listen needs the greeting finished and the microphone ready
+        await run_blocking(speech_queue.wait_idle)
+        await run_blocking(startup.result, "microphone")
+        startup.mark("first listen")
+        print(startup.report())
+        
+        while running:
+            try:
+                query = await run_blocking(take_user_input)
                 
-            # Process the query
-            else:
-                # First try to handle it as a conversation
-                if handle_conversation(query):
+                # Skip if no valid input
+                if query == "none" or query == "timeout":
                     continue
-                    
-                # Then check for specific commands
-                if "school mode" in query.lower():
-                    speak("Activating school mode. I'll check your emails and Google Classroom assignments.")
-                    result = school_mode()
-                    
-                    if result['success']:
-                        speak(f"I found {result['email_count']} new emails and {result['assignment_count']} pending assignments.")
-                        speak("I've created a detailed summary document for you.")
-                        speak("Would you like me to open the document?")
-                        
-                        response = take_user_input()
-                        if response and ("yes" in response.lower() or "sure" in response.lower() or "okay" in response.lower()):
-                            webbrowser.open(result['doc_url'])
-                            speak("I've opened the summary document in your browser.")
-                    else:
-                        speak(f"I encountered an error: {result['error']}")
-                        speak("Please make sure you have set up your Google credentials correctly.")
                 
-                elif 'open notepad' in query:
-                    speak("Opening Notepad for you.")
-                    open_notepad()
-
-                elif 'open discord' in query:
-                    speak("Opening Discord for you.")
-                    open_discord()
-
-                elif 'open command prompt' in query or 'open cmd' in query:
-                    speak("Opening Command Prompt for you.")
-                    open_cmd()
-
-                elif 'open camera' in query:
-                    speak("Opening Camera for you.")
-                    open_camera()
-
-                elif 'open calculator' in query:
-                    speak("Opening Calculator for you.")
-                    open_calculator()
-                    
-                # General app opening functionality
-                elif any(phrase in query for phrase in ["open ", "launch ", "start "]):
-                    app_name = extract_app_name(query)
-                    if app_name:
-                        speak(f"Opening {app_name} for you, sir.")
-                        success = open_application(app_name)
-                        if not success:
-                            speak(f"I couldn't find the application {app_name}. Would you like me to search for it online?")
-                            response = take_user_input()
-                            if response and ("yes" in response.lower() or "sure" in response.lower()):
-                                search_on_google(f"{app_name} download mac")
-                                speak(f"I've searched for {app_name} online for you.")
-
-                elif 'ip address' in query:
-                    ip_address = find_my_ip()
-                    speak(f'Your IP Address is {ip_address}.\n For your convenience, I am printing it on the screen sir.')
-                    print(f'Your IP Address is {ip_address}')
-
-                elif 'wikipedia' in query:
-                    speak('What do you want to search on Wikipedia, sir?')
-                    search_query = take_user_input().lower()
-                    if search_query not in ["none", "timeout", "exit"]:
-                        results = search_on_wikipedia(search_query)
-                        speak(f"According to Wikipedia, {results}")
-                        speak("For your convenience, I am printing it on the screen sir.")
-                        print(results)
-
-                elif 'youtube' in query:
-                    speak('What do you want to play on Youtube, sir?')
-                    video = take_user_input().lower()
-                    if video not in ["none", "timeout", "exit"]:
-                        play_on_youtube(video)
-
-                elif 'search on google' in query:
-                    speak('What do you want to search on Google, sir?')
-                    search_query = take_user_input().lower()
-                    if search_query not in ["none", "timeout", "exit"]:
-                        search_on_google(search_query)
-
-                elif "send whatsapp message" in query:
-                    speak('On what number should I send the message sir? Please enter in the console: ')
-                    number = input("Enter the number: ")
-                    speak("What is the message sir?")
-                    message = take_user_input().lower()
-                    if message not in ["none", "timeout", "exit"]:
-                        send_whatsapp_message(number, message)
-                        speak("I've sent the message sir.")
-
-                elif "send an email" in query:
-                    speak("On what email address do I send sir? Please enter in the console: ")
-                    receiver_address = input("Enter email address: ")
-                    speak("What should be the subject sir?")
-                    subject = take_user_input().capitalize()
-                    if subject not in ["none", "timeout", "exit"]:
-                        speak("What is the message sir?")
-                        message = take_user_input().capitalize()
-                        if message not in ["none", "timeout", "exit"]:
-                            if send_email(receiver_address, subject, message):
-                                speak("I've sent the email sir.")
-                            else:
-                                speak("Something went wrong while I was sending the mail. Please check the error logs sir.")
-
-                elif 'joke' in query:
-                    speak(f"Hope you like this one sir")
-                    joke = get_random_joke()
-                    speak(joke)
-                    speak("For your convenience, I am printing it on the screen sir.")
-                    pprint(joke)
-
-                elif "advice" in query:
-                    speak(f"Here's an advice for you, sir")
-                    advice = get_random_advice()
-                    speak(advice)
-                    speak("For your convenience, I am printing it on the screen sir.")
-                    pprint(advice)
-
-                elif "trending movies" in query:
-                    speak(f"Some of the trending movies are: {get_trending_movies()}")
-                    speak("For your convenience, I am printing it on the screen sir.")
-                    print(*get_trending_movies(), sep='\n')
-
-                elif 'news' in query:
-                    speak(f"I'm reading out the latest news headlines, sir")
-                    speak(get_latest_news())
-                    speak("For your convenience, I am printing it on the screen sir.")
-                    print(*get_latest_news(), sep='\n')
-
-                elif 'weather' in query:
-                    weather_data = get_reliable_weather("Leander,Texas")
-                    
-                    if weather_data["success"]:
-                        speak(f"Getting weather report for {weather_data['city']}, {weather_data['region']}")
-                        speak(f"The current temperature is {weather_data['temperature']}, but it feels like {weather_data['feels_like']}")
-                        speak(f"Also, the weather report talks about {weather_data['weather']}")
-                        speak("For your convenience, I am printing it on the screen sir.")
-                        print(f"Location: {weather_data['city']}, {weather_data['region']}, {weather_data['country']}")
-                        print(f"Description: {weather_data['weather']}")
-                        print(f"Temperature: {weather_data['temperature']}")
-                        print(f"Feels like: {weather_data['feels_like']}")
-                    else:
-                        speak("I apologize, but I couldn't fetch the weather information for Leander, Texas at the moment.")
-                        speak("This might be due to network issues or API limitations.")
+                with tracer.span("intent"):
+                    intent = route(query)
                 
-                # If no specific command matched, try to provide a helpful response
-                else:
-                    speak("I'm not sure how to help with that. Would you like me to search for information about it online?")
-                    response = take_user_input()
-                    if response and ("yes" in response.lower() or "sure" in response.lower()):
-                        search_on_google(query)
-                        speak(f"I've searched for information about '{query}' online for you.")
-        except KeyboardInterrupt:
-            speak("Goodbye! Have a great day!")
-            running = False
-            break
-        except Exception as e:
-            print(f"An error occurred: {str(e)}")
-            if comm_channel:
-                comm_channel.add_message(f"Error: {str(e)}", "error")
-            continue
+                # Check if we should exit
+                if intent == "exit":
+                    speak("Goodbye! Have a great day!")
+                    running = False
+                    break
+                
+                with tracer.span("handler", intent=intent or "unknown"):
+                    await run_blocking(dispatch, intent, query)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"An error occurred: {str(e)}")
+                if comm_channel:
+                    comm_channel.add_message(f"Error: {str(e)}", "error")
+                continue
+    except asyncio.CancelledError:
+        print("Assistant stopped mid-turn")
+    finally:
+        print(tracer.format_summary())
 
-def main():
-    """Main function to start the application"""
+def start_background_services():
+    """Work shared by both modes that runs alongside the assistant loop"""
+    # Listen for "Hey MAch" in the background; loading the model and opening the mic
+    # happen off the main thread so the window (or control API) is up straight away
+    threading.Thread(target=start_wake_word_listener, daemon=True).start()
+    
+    # Keep the weather warm so the greeting and weather intent answer instantly
+    weather_cache.start_prefetch()
+
+def run_gui():
+    """Run with the Qt window"""
     global comm_channel
+    # Imported here so headless mode never loads PyQt5
+    from jarvis_ui import launch_ui
     
     # Initialize UI
     app, window, comm = launch_ui()
@@ -520,8 +765,40 @@ def main():
     window.wake_button.clicked.connect(start_assistant)
     window.stop_button.clicked.connect(stop_assistant)
     
+    start_background_services()
+    print(f"{BOTNAME} ready (window)")
+    
     # Start the application
     sys.exit(app.exec_())
 
+def run_headless():
+    """Run without a window; start/stop/status/events are served over local HTTP"""
+    global comm_channel
+    from control import EventChannel, ControlServer
+    
+    comm_channel = EventChannel()
+    server = ControlServer(comm_channel, start=start_assistant, stop=stop_assistant,
+                           is_running=lambda: running, pause=pause_playback, resume=resume_playback).start()
+    
+    start_background_services()
+    print(f"{BOTNAME} ready (headless), control API on {server.address}")
+    
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stop_assistant()
+        server.shutdown()
+
+def main():
+    """Main function to start the application"""
+    global input_source, output_sink
+    input_source = make_input_source(INPUT_SOURCE)
+    output_sink = make_output_sink(OUTPUT_SINK)
+    
+    if HEADLESS or "--headless" in sys.argv:
+        run_headless()
+    else:
+        run_gui()
+
 if __name__ == '__main__':
     main()
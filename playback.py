@@ -0,0 +1,275 @@
+"""
+In-process audio playback.
+
+One output stream stays open for the whole session and utterances are written to it
+as 16-bit PCM in small blocks. Stop, pause and volume changes are applied between
+blocks, so they take effect within PLAYBACK_BLOCK_MS.
+
+AUDIO_OUTPUT selects the device:
+  pyaudio  the default sound card, through PortAudio
+  null     no sound card; audio is consumed at real-time speed and counted
+"""
+import array
+import sys
+import threading
+import time
+from decouple import config
+
+AUDIO_OUTPUT = config('AUDIO_OUTPUT', default='pyaudio')
+PLAYBACK_BLOCK_MS = config('PLAYBACK_BLOCK_MS', default=20, cast=int)
+# Volume while ducked, e.g. while the user is talking over the assistant
+DUCK_VOLUME = config('DUCK_VOLUME', default=0.3, cast=float)
+
+SAMPLE_WIDTH = 2  # 16-bit signed PCM
+
+
+class PyAudioOutput:
+    """Blocking PortAudio output stream, reopened only when the sample format changes"""
+    name = "pyaudio"
+
+    def __init__(self):
+        self._audio = None
+        self._stream = None
+        self._format = None
+
+    def open(self, rate, channels):
+        if self._stream is not None and self._format == (rate, channels):
+            return
+        self.close()
+        try:
+            import pyaudio
+        except ImportError:
+            raise RuntimeError("PyAudio is not installed; run `pip install PyAudio` or set AUDIO_OUTPUT=null")
+        if self._audio is None:
+            self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16, channels=channels, rate=rate, output=True)
+        self._format = (rate, channels)
+
+    def latency(self):
+        """Seconds between a write returning and the end of that audio reaching the speaker"""
+        return self._stream.get_output_latency() if self._stream is not None else 0.0
+
+    def write(self, pcm):
+        self._stream.write(bytes(pcm))
+
+    def close(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except OSError as e:
+                print(f"Error closing audio output: {str(e)}")
+            self._stream = None
+            self._format = None
+
+
+class NullOutput:
+    """Stands in for a sound card: takes audio as fast as a device would play it and counts it"""
+    name = "null"
+
+    def __init__(self, realtime=True):
+        self.realtime = realtime
+        self.rate = None
+        self.channels = None
+        self.frames_written = 0
+        self.peak = 0  # loudest sample of the last block, to check volume changes
+        self._clock = None
+
+    def open(self, rate, channels):
+        self.rate = rate
+        self.channels = channels
+        self._clock = None
+
+    def latency(self):
+        return 0.0
+
+    def write(self, pcm):
+        frames = len(pcm) // (SAMPLE_WIDTH * self.channels)
+        self.frames_written += frames
+        samples = array.array("h", bytes(pcm))
+        self.peak = max(map(abs, samples)) if samples else 0
+        if self.realtime:
+            # Return once the block would have finished playing, like a blocking device write
+            now = time.perf_counter()
+            # Start the clock afresh after an underrun (pause, slow network), not on timer jitter
+            if self._clock is None or self._clock < now - 0.05:
+                self._clock = now
+            self._clock += frames / self.rate
+            time.sleep(max(0.0, self._clock - now))
+
+    def close(self):
+        self._clock = None
+
+
+OUTPUTS = {
+    PyAudioOutput.name: PyAudioOutput,
+    NullOutput.name: NullOutput,
+}
+
+
+def scale(pcm, volume):
+    """Multiply 16-bit samples by volume"""
+    samples = array.array("h", bytes(pcm))
+    return array.array("h", (int(sample * volume) for sample in samples)).tobytes()
+
+
+def decode_mp3(data, rate, channels=1):
+    """Decode an MP3 buffer to 16-bit PCM; needs the optional miniaudio package"""
+    try:
+        import miniaudio
+    except ImportError:
+        raise RuntimeError("MP3 playback needs miniaudio; run `pip install miniaudio` or use a PCM output format")
+    decoded = miniaudio.decode(data, output_format=miniaudio.SampleFormat.SIGNED16,
+                               nchannels=channels, sample_rate=rate)
+    return decoded.samples.tobytes()
+
+
+class PlaybackEngine:
+    """Plays one utterance at a time on a long-lived output, with stop, pause and ducking"""
+
+    def __init__(self, output=None, block_ms=PLAYBACK_BLOCK_MS):
+        self.output = output or OUTPUTS[AUDIO_OUTPUT]()
+        self.block_ms = block_ms
+        self.volume = 1.0
+        # Bumped by every stop(), so a caller can tell whether it was stopped before play() began
+        self.generation = 0
+        self._stopped = threading.Event()
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._lock = threading.Lock()
+
+    def play(self, chunks, rate, channels=1, started=None, generation=None):
+        """
+        Write PCM chunks to the output as they arrive.
+        Returns first-byte, first-sound and total (end of playback) times in seconds from `started`.
+        With a generation from before the audio was prepared, nothing plays if stop() came in between.
+        """
+        if started is None:
+            started = time.perf_counter()
+        timings = {"first_byte": None, "first_sound": None, "total": None}
+        with self._lock:
+            self._stopped.clear()
+            if generation is not None and generation != self.generation:
+                return timings
+            self.output.open(rate, channels)
+            frame = SAMPLE_WIDTH * channels
+            block = max(1, int(rate * self.block_ms / 1000)) * frame
+            pending = bytearray()
+            for chunk in chunks:
+                if self._stopped.is_set():
+                    break
+                if not chunk:
+                    continue
+                if timings["first_byte"] is None:
+                    timings["first_byte"] = time.perf_counter() - started
+                pending += chunk
+                while len(pending) >= block and self._write(pending[:block], timings, started):
+                    del pending[:block]
+            # Play what is left, minus any half sample split off by the network
+            pending = pending[:len(pending) - len(pending) % frame]
+            if pending and not self._stopped.is_set():
+                self._write(pending, timings, started)
+            # Blocking writes return once the audio is queued; the device still has to play it out
+            timings["total"] = time.perf_counter() + self.output.latency() - started
+        return timings
+
+    def play_audio(self, data, audio_format, rate, channels=1):
+        """Play a whole buffer from memory, "pcm" or "mp3" """
+        if audio_format == "mp3":
+            data = decode_mp3(data, rate, channels)
+        return self.play([data], rate, channels)
+
+    def _write(self, pcm, timings, started):
+        """Write one block; returns False once stopped"""
+        while not self._resumed.wait(0.05):
+            if self._stopped.is_set():
+                return False
+        if self._stopped.is_set():
+            return False
+        if self.volume != 1.0:
+            pcm = scale(pcm, self.volume)
+        if timings["first_sound"] is None:
+            timings["first_sound"] = time.perf_counter() + self.output.latency() - started
+        self.output.write(pcm)
+        return True
+
+    def stop(self):
+        """Cut off the current utterance"""
+        self.generation += 1
+        self._stopped.set()
+        self._resumed.set()
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def duck(self, volume=DUCK_VOLUME):
+        """Lower the volume of whatever is playing until unduck()"""
+        self.volume = volume
+
+    def unduck(self):
+        self.volume = 1.0
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self.output.close()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The process-wide playback engine, opened on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = PlaybackEngine()
+    return _engine
+
+
+def tone(seconds, rate, frequency=440, amplitude=8000):
+    """A sine tone as 16-bit mono PCM"""
+    import math
+    samples = array.array("h", (int(amplitude * math.sin(2 * math.pi * frequency * i / rate))
+                                for i in range(int(seconds * rate))))
+    return samples.tobytes()
+
+
+def check(output=None, rate=22050):
+    """Exercise timing, stop, pause and ducking on the given output (the null device by default)"""
+    engine = PlaybackEngine(output or NullOutput())
+    audio = tone(1.0, rate)
+    chunks = [audio[i:i + 4096] for i in range(0, len(audio), 4096)]
+
+    timings = engine.play(chunks, rate)
+    print(f"1.00 s of audio: first sound at {timings['first_sound'] * 1000:.1f} ms, "
+          f"ended at {timings['total'] * 1000:.1f} ms")
+
+    threading.Timer(0.3, engine.stop).start()
+    started = time.perf_counter()
+    engine.play(chunks, rate)
+    print(f"Stop at 300 ms: playback returned after {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    engine.pause()
+    threading.Timer(0.5, engine.resume).start()
+    timings = engine.play(chunks, rate)
+    print(f"Paused for 500 ms before playing: ended at {timings['total'] * 1000:.1f} ms")
+
+    if isinstance(engine.output, NullOutput):
+        engine.duck(0.25)
+        engine.play([audio[:4096]], rate)
+        ducked = engine.output.peak
+        engine.unduck()
+        engine.play([audio[:4096]], rate)
+        print(f"Ducked to 25%: peak {ducked} vs {engine.output.peak} at full volume")
+    engine.close()
+
+
+if __name__ == "__main__":
+    # python playback.py [null|pyaudio]
+    check(OUTPUTS[sys.argv[1]]() if len(sys.argv) > 1 else None)
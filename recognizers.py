@@ -0,0 +1,165 @@
+"""Pluggable speech-to-text backends with automatic fallback"""
+import json
+import sys
+import time
+from pathlib import Path
+import speech_recognition as sr
+from decouple import config, Csv
+
+# Backends to try, in order; later ones are used when earlier ones fail
+STT_BACKENDS = config('STT_BACKENDS', default='google,vosk', cast=Csv())
+STT_LANGUAGE = config('STT_LANGUAGE', default='en-in')
+VOSK_MODEL_PATH = config('VOSK_MODEL_PATH', default='model')
+
+
+class GoogleBackend:
+    """Google Web Speech API through SpeechRecognition (needs network)"""
+    name = "google"
+
+    def __init__(self, language=STT_LANGUAGE):
+        self.language = language
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio,
+                                                language=self.language,
+                                                show_all=False)  # Get the most confident result
+
+
+class VoskBackend:
+    """Offline, CPU-only recognition with a Vosk model loaded once per session"""
+    name = "vosk"
+    sample_rate = 16000
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        self.model_path = model_path
+        self.model = None
+
+    def load(self):
+        """Load the model once; raises sr.RequestError if vosk or the model is missing"""
+        if self.model is None:
+            try:
+                from vosk import Model, SetLogLevel
+            except ImportError:
+                raise sr.RequestError("vosk is not installed; run `pip install vosk`")
+            if not Path(self.model_path).exists():
+                raise sr.RequestError(f"Vosk model not found at {self.model_path}")
+            SetLogLevel(-1)
+            self.model = Model(self.model_path)
+        return self.model
+
+    def recognize(self, audio):
+        # load() turns a missing vosk into RequestError, so the chain moves on to the next backend
+        model = self.load()
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(model, self.sample_rate)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    VoskBackend.name: VoskBackend,
+}
+
+
+class RecognizerChain:
+    """Tries each configured backend in turn until one is reachable"""
+
+    def __init__(self, names=STT_BACKENDS):
+        self.backends = []
+        for name in names:
+            name = name.strip()
+            if name not in BACKENDS:
+                print(f"Unknown speech recognition backend: {name}")
+                continue
+            self.backends.append(BACKENDS[name]())
+        if not self.backends:
+            self.backends.append(GoogleBackend())
+
+    def warm_up(self):
+        """Load local models now instead of during the first turn"""
+        for backend in self.backends:
+            load = getattr(backend, "load", None)
+            if load:
+                try:
+                    load()
+                except sr.RequestError as e:
+                    print(f"{backend.name} recognition unavailable: {str(e)}")
+
+    def recognize(self, audio):
+        """
+        Return the transcript from the first backend that answers.
+        UnknownValueError means the speech was unintelligible and is not retried elsewhere;
+        RequestError (offline, missing model...) falls through to the next backend.
+        """
+        last_error = None
+        for backend in self.backends:
+            try:
+                return backend.recognize(audio)
+            except sr.RequestError as e:
+                print(f"{backend.name} recognition unavailable: {str(e)}")
+                last_error = e
+        raise last_error
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the reference length"""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / max(len(ref), 1)
+
+
+def benchmark(fixtures_dir, names=STT_BACKENDS):
+    """
+    Run every WAV in fixtures_dir through each backend.
+    The expected transcript for foo.wav is read from foo.txt next to it.
+    """
+    fixtures = sorted(Path(fixtures_dir).glob("*.wav"))
+    reader = sr.Recognizer()
+    samples = []
+    for wav in fixtures:
+        with sr.AudioFile(str(wav)) as source:
+            audio = reader.record(source)
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        transcript = wav.with_suffix(".txt")
+        reference = transcript.read_text().strip() if transcript.exists() else ""
+        samples.append((wav.name, audio, duration, reference))
+
+    for name in names:
+        backend = BACKENDS[name.strip()]()
+        errors = 0.0
+        audio_seconds = 0.0
+        compute_seconds = 0.0
+        for wav_name, audio, duration, reference in samples:
+            started = time.perf_counter()
+            try:
+                hypothesis = backend.recognize(audio)
+            except (sr.UnknownValueError, sr.RequestError) as e:
+                hypothesis = ""
+                print(f"  {name} failed on {wav_name}: {e!r}")
+            compute_seconds += time.perf_counter() - started
+            audio_seconds += duration
+            errors += word_error_rate(reference, hypothesis)
+        count = max(len(samples), 1)
+        print(f"{name}: WER {errors / count:.1%}, real-time factor {compute_seconds / max(audio_seconds, 1e-9):.2f} "
+              f"({len(samples)} files, {audio_seconds:.1f} s of audio)")
+
+
+if __name__ == "__main__":
+    # Usage: python recognizers.py fixtures/ [google,vosk]
+    if len(sys.argv) < 2:
+        print("Usage: python recognizers.py FIXTURES_DIR [backend,backend]")
+    else:
+        benchmark(sys.argv[1], sys.argv[2].split(",") if len(sys.argv) > 2 else STT_BACKENDS)
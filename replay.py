@@ -0,0 +1,113 @@
+"""
+Replay scripted queries through the real routing, handlers and speech queue.
+
+Usage: python replay.py QUERIES_FILE [--repeat N] [--sink null|record] [--speak-ms-per-char MS] [--verbose]
+       python replay.py --stop-latency
+
+Each line of the file is one query. Handlers that ask a follow-up question read
+the next line, just as they would take the next utterance. Reports throughput and
+latency percentiles per intent; a turn lasts from dispatch until everything it
+queued has been spoken by the sink.
+"""
+import argparse
+import contextlib
+import time
+from collections import defaultdict
+
+import main
+from sinks import NullSink, RecordingSink
+from sources import FileSource, QueuedSource
+from tracing import percentile
+
+
+def replay(path, repeat=1, sink=None):
+    """Run every query in the file and return {intent: [turn latency in seconds]}"""
+    main.input_source = FileSource(path, repeat)
+    main.output_sink = sink or NullSink()
+    main.running = True
+
+    latencies = defaultdict(list)
+    while True:
+        query = main.take_user_input()
+        if query == "exit":
+            break
+        if query in ("none", "timeout"):
+            continue
+        started = time.perf_counter()
+        intent = main.route(query)
+        if intent != "exit":
+            try:
+                main.dispatch(intent, query)
+            except Exception as e:
+                print(f"An error occurred: {str(e)}")
+                intent = f"{intent or 'unknown'} (failed)"
+        main.speech_queue.wait_idle()
+        latencies[intent or "unknown"].append(time.perf_counter() - started)
+    main.running = False
+    return latencies
+
+
+def report(latencies, elapsed):
+    turns = sum(len(values) for values in latencies.values())
+    print(f"{turns} turns in {elapsed:.2f} s, {turns / max(elapsed, 1e-9):.0f} turns/s")
+    print(f"{'intent':<20} {'turns':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for intent, values in sorted(latencies.items(), key=lambda item: -len(item[1])):
+        print(f"{intent:<20} {len(values):>6} {percentile(values, 0.5) * 1000:>9.2f} "
+              f"{percentile(values, 0.95) * 1000:>9.2f} {percentile(values, 0.99) * 1000:>9.2f}")
+
+
+def stop_latency(settle=1.0):
+    """
+    Press Stop while the assistant is listening, running a slow handler, or speaking,
+    and return {scenario: seconds until the session has finished and the sink is quiet}
+    """
+    main.greet_user = lambda startup=None: None
+    scenarios = {
+        "listening": ([], None, 0.0),
+        "slow handler": (["news"], lambda query: time.sleep(5), 0.0),
+        "speaking": (["news"], lambda query: main.speak("word " * 400), 0.01),
+    }
+    results = {}
+    for name, (lines, handler, seconds_per_char) in scenarios.items():
+        main.input_source = QueuedSource()
+        for line in lines:
+            main.input_source.put(line)
+        main.output_sink = RecordingSink(seconds_per_char)
+        if handler:
+            main.INTENT_HANDLERS["news"] = handler
+        main.start_assistant()
+        time.sleep(settle)
+        stopped = time.perf_counter()
+        main.stop_assistant()
+        main.wait_until_stopped()
+        results[name] = time.perf_counter() - stopped
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay scripted queries through the assistant")
+    parser.add_argument("queries", nargs="?")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--sink", choices=["null", "record"], default="null")
+    parser.add_argument("--speak-ms-per-char", type=float, default=0.0,
+                        help="simulated speaking time for the record sink")
+    parser.add_argument("--verbose", action="store_true", help="show the assistant's per-turn output")
+    parser.add_argument("--stop-latency", action="store_true", help="measure how long Stop takes to reach idle")
+    args = parser.parse_args()
+    if args.stop_latency:
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(None):
+            results = stop_latency()
+        for name, seconds in results.items():
+            print(f"Stop while {name}: idle after {seconds * 1000:.1f} ms")
+        raise SystemExit()
+    if not args.queries:
+        parser.error("a queries file is required")
+
+    sink = RecordingSink(args.speak_ms_per_char / 1000) if args.sink == "record" else NullSink()
+    started = time.perf_counter()
+    # print() is a no-op while sys.stdout is None, which keeps logging out of the measurement
+    with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(None):
+        latencies = replay(args.queries, args.repeat, sink)
+    report(latencies, time.perf_counter() - started)
+    if isinstance(sink, RecordingSink):
+        print(f"{len(sink.spoken)} replies recorded")
@@ -0,0 +1,72 @@
+"""
+Where the assistant's replies go.
+
+OUTPUT_SINK selects one:
+  tts     synthesize and play through the speakers (the default)
+  null    drop replies, so only routing, handlers and queueing are measured
+  record  keep replies in memory, optionally taking a simulated speaking time
+"""
+import threading
+import time
+from decouple import config
+from synthesizers import SynthesizerPolicy
+from tts import stop_playback
+
+OUTPUT_SINK = config('OUTPUT_SINK', default='tts')
+
+
+class TTSSink:
+    """Speak through ElevenLabs or the local voice (see synthesizers.py) and the playback engine"""
+    name = "tts"
+
+    def __init__(self, policy=None):
+        self.policy = policy or SynthesizerPolicy()
+
+    def say(self, text):
+        self.policy.speak(text)
+
+    def stop(self):
+        stop_playback()
+
+
+class NullSink:
+    """Discard every reply"""
+    name = "null"
+
+    def say(self, text):
+        pass
+
+    def stop(self):
+        pass
+
+
+class RecordingSink:
+    """Keep (timestamp, text) for every reply; seconds_per_char simulates playback time"""
+    name = "record"
+
+    def __init__(self, seconds_per_char=0.0):
+        self.seconds_per_char = seconds_per_char
+        self.spoken = []
+        self._interrupted = threading.Event()
+
+    def say(self, text):
+        self._interrupted.clear()
+        self.spoken.append((time.time(), text))
+        if self.seconds_per_char:
+            self._interrupted.wait(len(text) * self.seconds_per_char)
+
+    def stop(self):
+        self._interrupted.set()
+
+
+SINKS = {
+    TTSSink.name: TTSSink,
+    NullSink.name: NullSink,
+    RecordingSink.name: RecordingSink,
+}
+
+
+def make_output_sink(name=OUTPUT_SINK):
+    if name not in SINKS:
+        raise ValueError(f"Unknown output sink: {name}")
+    return SINKS[name]()
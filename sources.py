@@ -0,0 +1,110 @@
+"""
+Text input sources that can stand in for the microphone.
+
+INPUT_SOURCE selects one:
+  mic                 speech from the microphone (the default)
+  stdin               one query per line typed or piped in
+  file:PATH           one query per line from a file; blank lines and # comments are skipped
+  socket:[HOST:]PORT  one query per line from any TCP client, e.g. `nc localhost 8766`
+"""
+import queue
+import socketserver
+import sys
+import threading
+from decouple import config
+
+INPUT_SOURCE = config('INPUT_SOURCE', default='mic')
+
+_EOF = object()
+
+
+class QueuedSource:
+    """Lines of text waiting to be read as queries"""
+
+    def __init__(self):
+        self.lines = queue.Queue()
+
+    def read(self, timeout=None):
+        """Next query, or None on timeout; raises EOFError once the source is exhausted"""
+        try:
+            line = self.lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if line is _EOF:
+            # Keep reporting the end to any later reader
+            self.lines.put(_EOF)
+            raise EOFError()
+        return line
+
+    def unread(self, line):
+        """Hand back a line taken by a reader that no longer wants it, e.g. a turn cancelled by Stop"""
+        with self.lines.mutex:
+            self.lines.queue.appendleft(line)
+            self.lines.not_empty.notify()
+
+    def put(self, line):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            self.lines.put(line)
+
+    def close(self):
+        self.lines.put(_EOF)
+
+
+class StdinSource(QueuedSource):
+    """Queries typed or piped into standard input"""
+
+    def __init__(self, stream=None):
+        super().__init__()
+        self.stream = stream or sys.stdin
+        threading.Thread(target=self._run, name="stdin-source", daemon=True).start()
+
+    def _run(self):
+        for line in self.stream:
+            self.put(line)
+        self.close()
+
+
+class FileSource(QueuedSource):
+    """Scripted queries from a file, optionally played several times over"""
+
+    def __init__(self, path, repeat=1):
+        super().__init__()
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+        for _ in range(repeat):
+            for line in lines:
+                self.put(line)
+        self.close()
+
+
+class SocketSource(QueuedSource):
+    """Queries sent as lines over TCP; never runs out"""
+
+    def __init__(self, host="127.0.0.1", port=8766):
+        super().__init__()
+        source = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    source.put(line.decode("utf-8", errors="replace"))
+
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="socket-source", daemon=True).start()
+
+
+def make_input_source(spec=INPUT_SOURCE):
+    """Build the source named by spec; None means the microphone"""
+    kind, _, argument = spec.strip().partition(":")
+    if kind == "mic":
+        return None
+    if kind == "stdin":
+        return StdinSource()
+    if kind == "file":
+        return FileSource(argument)
+    if kind == "socket":
+        host, _, port = argument.rpartition(":")
+        return SocketSource(host or "127.0.0.1", int(port or 8766))
+    raise ValueError(f"Unknown input source: {spec}")
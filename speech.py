@@ -0,0 +1,143 @@
+"""Sentence-level pipelined speech synthesis and playback"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decouple import config
+from tts import request_speech, play_stream, format_timings, output_format, TTS_STREAMING, TTS_CHUNK_SIZE
+from tts_cache import TTSCache, cache_key, TTS_CACHE_ENABLED
+from tracing import tracer
+
+# How many sentences may be synthesized ahead of the one currently playing
+TTS_WORKERS = config('TTS_WORKERS', default=3, cast=int)
+# Fragments shorter than this are merged into the next sentence to avoid tiny requests
+SENTENCE_MIN_CHARS = config('SENTENCE_MIN_CHARS', default=40, cast=int)
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+|\n+')
+
+_cache = None
+_cache_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class SpeechServiceError(Exception):
+    """Raised when the TTS service answers with a non-200 status"""
+
+    def __init__(self, status_code, body=""):
+        super().__init__(f"Error from speech service: {status_code}")
+        self.status_code = status_code
+        self.body = body
+
+
+def get_tts_cache():
+    """Open the speech cache on first use"""
+    global _cache
+    if _cache is None and TTS_CACHE_ENABLED:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = TTSCache()
+                except OSError as e:
+                    print(f"TTS cache unavailable: {str(e)}")
+    return _cache
+
+
+def get_executor():
+    """Bounded worker pool shared by every utterance"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+    return _executor
+
+
+def split_sentences(text):
+    """Split text into sentences, merging fragments that are too short to be worth a request"""
+    sentences = []
+    pending = ""
+    for part in SENTENCE_END.split(text.strip()):
+        part = part.strip()
+        if not part:
+            continue
+        pending = f"{pending} {part}" if pending else part
+        if len(pending) >= SENTENCE_MIN_CHARS:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences and len(pending) < SENTENCE_MIN_CHARS:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+def stream_audio(text, stream=TTS_STREAMING):
+    """Yield audio chunks for one sentence from the cache or the API, caching what is downloaded"""
+    cache = get_tts_cache()
+    key = cache_key(text)
+    cached_audio = cache.get(key) if cache else None
+    if cached_audio is not None:
+        yield cached_audio
+        return
+
+    with tracer.span("tts_request", chars=len(text)):
+        response = request_speech(text, stream=stream)
+    if response.status_code != 200:
+        raise SpeechServiceError(response.status_code, response.text)
+
+    audio_chunks = []
+    for chunk in response.iter_content(chunk_size=TTS_CHUNK_SIZE):
+        audio_chunks.append(chunk)
+        yield chunk
+
+    if cache:
+        cache.put(key, b"".join(audio_chunks))
+
+
+def synthesize(text):
+    """Return the full audio for one sentence"""
+    return b"".join(stream_audio(text, stream=False))
+
+
+def pipelined_audio(sentences, played=None):
+    """
+    Yield audio for the sentences in order.
+    The first sentence is streamed while the rest are synthesized in the worker pool.
+    Each sentence is appended to played once all of its audio has been taken.
+    """
+    executor = get_executor()
+    futures = [executor.submit(synthesize, sentence) for sentence in sentences[1:]]
+    try:
+        yield from stream_audio(sentences[0])
+        if played is not None:
+            played.append(sentences[0])
+        for sentence, future in zip(sentences[1:], futures):
+            yield future.result()
+            if played is not None:
+                played.append(sentence)
+    finally:
+        # Don't spend quota on sentences that will never be played
+        for future in futures:
+            future.cancel()
+
+
+def speak_text(text, played=None):
+    """
+    Synthesize and play text, returning latency timings.
+    Sentences that have been played are appended to played, so a caller can resume after a failure.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return {}
+
+    started = time.perf_counter()
+    # One playback call receives every sentence, so they play back to back without gaps
+    # MP3 is decoded whole before it plays, so no sentence counts as played until all have arrived
+    progress = played if output_format()[0] != "mp3" else None
+    timings = play_stream(pipelined_audio(sentences, progress), started)
+    tracer.record("tts_first_byte", started, timings["first_byte"])
+    tracer.record("tts_playback", started, timings["total"])
+    print(f"Speech latency ({len(sentences)} sentences) - {format_timings(timings)}")
+    return timings
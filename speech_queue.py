@@ -0,0 +1,82 @@
+"""Background speech queue so callers don't block on synthesis and playback"""
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
+class SpeechQueue:
+    """
+    Plays utterances one at a time on a worker thread, lowest priority value first.
+    Each call to say() returns a Future that resolves to True once the text has been
+    played, or False if playback was interrupted; queued items that never start are cancelled.
+    """
+
+    def __init__(self, play, stop=None):
+        self._play = play  # blocking callable that speaks one utterance
+        self._stop = stop  # callable that interrupts the utterance being played
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._generation = 0
+        self._worker = None
+
+    def say(self, text, priority=PRIORITY_NORMAL):
+        """Queue text and return its completion future"""
+        future = Future()
+        with self._lock:
+            self._pending += 1
+            self._queue.put((priority, next(self._order), self._generation, text, future))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="speech-queue", daemon=True)
+                self._worker.start()
+        return future
+
+    def pending(self):
+        """Number of utterances queued or playing"""
+        with self._lock:
+            return self._pending
+
+    def wait_idle(self, timeout=None):
+        """Block until everything queued so far has been played or cancelled"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def cancel_all(self):
+        """Barge-in: drop everything queued and stop the current utterance"""
+        with self._lock:
+            # Items queued before this point are skipped by the worker
+            self._generation += 1
+        if self._stop:
+            self._stop()
+
+    def _finish(self):
+        with self._idle:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def _run(self):
+        while True:
+            _, _, generation, text, future = self._queue.get()
+            with self._lock:
+                stale = generation != self._generation
+            if stale or not future.set_running_or_notify_cancel():
+                future.cancel()
+                self._finish()
+                continue
+            try:
+                self._play(text)
+                with self._lock:
+                    interrupted = generation != self._generation
+                future.set_result(not interrupted)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._finish()
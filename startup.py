@@ -0,0 +1,74 @@
+"""Runs independent startup phases concurrently and records a timeline"""
+import threading
+import time
+from concurrent.futures import Future
+
+
+class StartupTimeline:
+    """Starts each phase on its own thread and keeps (start, end) offsets from creation"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}  # name -> [start, end, error]
+        self.marks = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def run(self, name, fn, *args):
+        """Start a phase in the background and return its future"""
+        future = Future()
+        with self._lock:
+            self.phases[name] = [self.elapsed(), None, None]
+            self._futures[name] = future
+
+        def phase():
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                self.phases[name][2] = e
+                print(f"Startup phase '{name}' failed: {str(e)}")
+                future.set_exception(e)
+            finally:
+                self.phases[name][1] = self.elapsed()
+
+        threading.Thread(target=phase, name=f"startup-{name}", daemon=True).start()
+        return future
+
+    def result(self, name, timeout=None, default=None):
+        """Wait for a phase; returns default if it failed or ran past the timeout"""
+        try:
+            return self._futures[name].result(timeout=timeout)
+        except Exception:
+            return default
+
+    def wait(self, timeout=None):
+        """Wait for every phase to finish"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for future in list(self._futures.values()):
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            try:
+                future.result(timeout=remaining)
+            except Exception:
+                pass
+
+    def mark(self, name):
+        """Record a point in time, such as the first time the mic starts listening"""
+        self.marks[name] = self.elapsed()
+
+    def report(self):
+        """Per-phase timeline in milliseconds"""
+        lines = []
+        for name, (start, end, error) in sorted(self.phases.items(), key=lambda item: item[1][0]):
+            if end is None:
+                status = "still running"
+            else:
+                status = f"{start * 1000:.0f}-{end * 1000:.0f} ms"
+                if error is not None:
+                    status += " (failed)"
+            lines.append(f"  {name}: {status}")
+        for name, at in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"  {name}: at {at * 1000:.0f} ms")
+        return "Startup timeline:\n" + "\n".join(lines)
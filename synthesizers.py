@@ -0,0 +1,436 @@
+"""
+Interchangeable speech synthesizers and the policy that picks one per utterance.
+
+  elevenlabs  the ElevenLabs HTTP API, pipelined sentence by sentence (speech.py)
+  local       pyttsx3, using the operating system's offline voices
+
+Both play through the same playback engine, so Stop, pause and ducking work the same.
+TTS_ENGINE=auto (the default) uses ElevenLabs and falls back to the local voice when it
+fails, when it has been failing or slow lately, when there is no API key, or for short
+replies up to LOCAL_TTS_MAX_CHARS.
+
+Usage: python synthesizers.py [--backend elevenlabs|local] [--repeat N]
+prints the synthesis real-time factor of each available backend;
+python synthesizers.py --check runs the policy checks against fake synthesizers.
+"""
+import argparse
+import os
+import struct
+import tempfile
+import threading
+import time
+import wave
+from array import array
+from collections import deque
+from decouple import config
+from playback import get_engine, decode_mp3, tone, NullOutput, PlaybackEngine
+from speech import speak_text, split_sentences, SpeechServiceError
+from tracing import tracer, percentile
+from tts import ELEVENLABS_API_KEY, output_format, request_speech
+
+TTS_ENGINE = config('TTS_ENGINE', default='auto')
+# Replies this short go to the local voice (0 keeps one voice for everything)
+LOCAL_TTS_MAX_CHARS = config('LOCAL_TTS_MAX_CHARS', default=0, cast=int)
+LOCAL_TTS_RATE = config('LOCAL_TTS_RATE', default=0, cast=int)  # words per minute, 0 = system default
+# ElevenLabs is skipped for TTS_RETRY_SECONDS once its recent error rate or median
+# time to first sound goes over these limits
+TTS_MAX_ERROR_RATE = config('TTS_MAX_ERROR_RATE', default=0.5, cast=float)
+TTS_LATENCY_BUDGET_MS = config('TTS_LATENCY_BUDGET_MS', default=1500, cast=float)
+TTS_HEALTH_WINDOW = config('TTS_HEALTH_WINDOW', default=10, cast=int)
+TTS_RETRY_SECONDS = config('TTS_RETRY_SECONDS', default=60, cast=float)
+
+
+class ElevenLabsSynthesizer:
+    """Cloud voice; long replies are synthesized sentence by sentence while earlier ones play"""
+    name = "elevenlabs"
+
+    def available(self):
+        return bool(ELEVENLABS_API_KEY)
+
+    def speak(self, text, played=None, generation=None):
+        return speak_text(text, played)
+
+    def synthesize(self, text):
+        """Full 16-bit PCM for text, uncached; returns (pcm, sample rate)"""
+        codec, rate = output_format()
+        response = request_speech(text, stream=False)
+        if response.status_code != 200:
+            raise SpeechServiceError(response.status_code, response.text)
+        audio = response.content
+        return (decode_mp3(audio, rate) if codec == "mp3" else audio), rate
+
+
+def read_aiff(path):
+    """(16-bit little-endian PCM, sample rate, channels) from an uncompressed AIFF or AIFF-C file"""
+    with open(path, "rb") as f:
+        data = f.read()
+    form, kind = data[8:12], None
+    chunks = {}
+    offset = 12
+    while offset + 8 <= len(data):
+        name, size = struct.unpack(">4sI", data[offset:offset + 8])
+        chunks.setdefault(name, data[offset + 8:offset + 8 + size])
+        offset += 8 + size + (size & 1)  # chunks are padded to an even length
+    common, sound = chunks.get(b"COMM"), chunks.get(b"SSND")
+    if common is None or sound is None:
+        raise RuntimeError("Local voice produced an AIFF file without audio")
+    channels, frames, bits = struct.unpack(">hIh", common[:8])
+    exponent, mantissa = struct.unpack(">HQ", common[8:18])
+    rate = round(mantissa * 2.0 ** ((exponent & 0x7fff) - 16383 - 63))
+    if form == b"AIFC":
+        kind = common[18:22]
+        if kind not in (b"NONE", b"sowt"):
+            raise RuntimeError(f"Local voice produced compressed AIFF-C audio ({kind.decode('latin-1')})")
+    if bits != 16:
+        raise RuntimeError(f"Local voice produced {bits}-bit audio, expected 16-bit")
+    start = 8 + struct.unpack(">I", sound[:4])[0]
+    pcm = sound[start:start + frames * channels * 2]
+    if kind != b"sowt":
+        # AIFF samples are big-endian; playback wants little-endian
+        samples = array("h", pcm)
+        samples.byteswap()
+        pcm = samples.tobytes()
+    return pcm, rate, channels
+
+
+class LocalSynthesizer:
+    """Offline voice through pyttsx3 (SAPI5, NSSpeechSynthesizer or eSpeak)"""
+    name = "local"
+
+    def __init__(self, words_per_minute=LOCAL_TTS_RATE, playback=None):
+        self.words_per_minute = words_per_minute
+        self.playback = playback  # the shared playback engine unless given
+        self._driver = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        try:
+            import pyttsx3  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def playback_engine(self):
+        return self.playback or get_engine()
+
+    def _get_driver(self):
+        if self._driver is None:
+            import pyttsx3
+            self._driver = pyttsx3.init()
+            if self.words_per_minute:
+                self._driver.setProperty("rate", self.words_per_minute)
+        return self._driver
+
+    def synthesize(self, text):
+        """Render text to a temporary file and return (16-bit PCM, sample rate, channels)"""
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            # pyttsx3 drivers are not thread-safe
+            with self._lock:
+                driver = self._get_driver()
+                driver.save_to_file(text, path)
+                driver.runAndWait()
+            with open(path, "rb") as f:
+                header = f.read(12)
+            # The macOS driver writes AIFF whatever the file is called
+            if header[:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC"):
+                return read_aiff(path)
+            if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+                raise RuntimeError(f"Local voice produced audio in an unknown format ({header[:4]!r})")
+            with wave.open(path, "rb") as audio:
+                if audio.getsampwidth() != 2:
+                    raise RuntimeError(f"Local voice produced {audio.getsampwidth() * 8}-bit audio, expected 16-bit")
+                return audio.readframes(audio.getnframes()), audio.getframerate(), audio.getnchannels()
+        finally:
+            os.remove(path)
+
+    def speak(self, text, played=None, generation=None):
+        """
+        Synthesize, then play, unless stop() was called on the playback engine after `generation`
+        (by default, after this call began)
+        """
+        started = time.perf_counter()
+        engine = self.playback_engine()
+        if generation is None:
+            generation = engine.generation
+        pcm, rate, channels = self.synthesize(text)
+        # A Stop during synthesis must not be undone by play() starting afresh
+        timings = engine.play([pcm], rate, channels, started=started, generation=generation)
+        if played is not None and timings["total"] is not None:
+            played.append(text)
+        tracer.record("tts_first_byte", started, timings["first_byte"], backend=self.name)
+        tracer.record("tts_playback", started, timings["total"], backend=self.name)
+        return timings
+
+
+class SynthesizerPolicy:
+    """Chooses a synthesizer for each utterance and falls back to the other one on failure"""
+
+    def __init__(self, cloud=None, local=None, mode=TTS_ENGINE, local_max_chars=LOCAL_TTS_MAX_CHARS,
+                 max_error_rate=TTS_MAX_ERROR_RATE, latency_budget=TTS_LATENCY_BUDGET_MS / 1000,
+                 window=TTS_HEALTH_WINDOW, retry_seconds=TTS_RETRY_SECONDS):
+        if mode not in ("auto", ElevenLabsSynthesizer.name, LocalSynthesizer.name):
+            raise ValueError(f"Unknown TTS engine: {mode}")
+        self.cloud = cloud or ElevenLabsSynthesizer()
+        self.local = local or LocalSynthesizer()
+        self.mode = mode
+        self.local_max_chars = local_max_chars
+        self.max_error_rate = max_error_rate
+        self.latency_budget = latency_budget
+        self.retry_seconds = retry_seconds
+        # (succeeded, seconds to first sound) for recent ElevenLabs utterances
+        self.cloud_results = deque(maxlen=window)
+        self._last_cloud_attempt = 0.0
+        self._local_available = None
+
+    def local_available(self):
+        if self._local_available is None:
+            self._local_available = self.local.available()
+        return self._local_available
+
+    def cloud_degraded(self):
+        """Whether ElevenLabs has been failing or slow lately; None if it looks healthy"""
+        if not self.cloud_results or time.monotonic() - self._last_cloud_attempt > self.retry_seconds:
+            return None
+        failures = sum(1 for succeeded, _ in self.cloud_results if not succeeded)
+        if failures / len(self.cloud_results) > self.max_error_rate:
+            return f"{failures} of the last {len(self.cloud_results)} requests failed"
+        latencies = [latency for succeeded, latency in self.cloud_results if succeeded and latency is not None]
+        if latencies and percentile(latencies, 0.5) > self.latency_budget:
+            return f"median first sound {percentile(latencies, 0.5) * 1000:.0f} ms is over budget"
+        return None
+
+    def choose(self, text):
+        """Return (synthesizer, reason)"""
+        if self.mode == LocalSynthesizer.name:
+            return self.local, "TTS_ENGINE=local"
+        if self.mode == ElevenLabsSynthesizer.name or not self.local_available():
+            return self.cloud, "default"
+        if not self.cloud.available():
+            return self.local, "no ElevenLabs API key"
+        if len(text) <= self.local_max_chars:
+            return self.local, "short reply"
+        degraded = self.cloud_degraded()
+        if degraded:
+            return self.local, f"ElevenLabs degraded: {degraded}"
+        return self.cloud, "default"
+
+    def speak(self, text):
+        synthesizer, reason = self.choose(text)
+        # Taken before anything is synthesized, so a Stop from here on silences the fallback too
+        generation = self.local.playback_engine().generation
+        if synthesizer is self.local:
+            if reason != "short reply":
+                print(f"Using the local voice ({reason})")
+            return self.local.speak(text, generation=generation)
+
+        self._last_cloud_attempt = time.monotonic()
+        played = []
+        try:
+            timings = self.cloud.speak(text, played)
+        except Exception:
+            self.cloud_results.append((False, None))
+            if self.mode != "auto" or not self.local_available():
+                raise
+            # Carry on in the local voice from the first sentence that was not played
+            remaining = split_sentences(text)[len(played):]
+            print(f"ElevenLabs failed after {len(played)} sentences; speaking the rest with the local voice")
+            return self.local.speak(" ".join(remaining), generation=generation) if remaining else {}
+        self.cloud_results.append((True, timings.get("first_sound")))
+        return timings
+
+
+def real_time_factor(synthesizer, text, repeat=1):
+    """Median (synthesis seconds / audio seconds) and audio seconds for text"""
+    factors = []
+    duration = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = synthesizer.synthesize(text)
+        elapsed = time.perf_counter() - started
+        pcm, rate = result[0], result[1]
+        channels = result[2] if len(result) > 2 else 1
+        duration = len(pcm) / (2 * channels * rate)
+        factors.append(elapsed / duration if duration else float("inf"))
+    return percentile(factors, 0.5), duration
+
+
+BENCHMARK_TEXTS = [
+    "Sure, one moment.",
+    "The weather in London is fourteen degrees and cloudy.",
+    "Here are today's top headlines. Markets rallied after the central bank held rates steady. "
+    "A new telescope has photographed the most distant galaxy yet observed. "
+    "And the local team won in extra time to reach the final.",
+]
+
+
+def benchmark(backends, repeat=3):
+    print(f"{'backend':<12} {'chars':>6} {'sentences':>10} {'audio s':>8} {'RTF':>7}")
+    for synthesizer in backends:
+        if not synthesizer.available():
+            print(f"{synthesizer.name:<12} unavailable")
+            continue
+        for text in BENCHMARK_TEXTS:
+            try:
+                factor, duration = real_time_factor(synthesizer, text, repeat)
+            except Exception as e:
+                print(f"{synthesizer.name:<12} failed: {str(e)}")
+                break
+            print(f"{synthesizer.name:<12} {len(text):>6} {len(split_sentences(text)):>10} "
+                  f"{duration:>8.2f} {factor:>7.3f}")
+
+
+class FakeSynthesizer:
+    """Records what it is asked to say; fails before sentence fail_at when set"""
+
+    def __init__(self, name, first_sound=0.05, fail_at=None, available=True):
+        self.name = name
+        self.first_sound = first_sound
+        self.fail_at = fail_at
+        self.is_available = available
+        self.spoken = []
+        self.playback = PlaybackEngine(NullOutput(realtime=False))
+
+    def available(self):
+        return self.is_available
+
+    def playback_engine(self):
+        return self.playback
+
+    def speak(self, text, played=None, generation=None):
+        for index, sentence in enumerate(split_sentences(text)):
+            if index == self.fail_at:
+                raise SpeechServiceError(500)
+            self.spoken.append(sentence)
+            if played is not None:
+                played.append(sentence)
+        return {"first_byte": self.first_sound, "first_sound": self.first_sound, "total": self.first_sound}
+
+
+def check():
+    """Exercise the policy with fake synthesizers and Stop during local synthesis; returns a list of failures"""
+    failures = []
+
+    def policy(cloud=None, local=None, **kwargs):
+        return SynthesizerPolicy(cloud or FakeSynthesizer("elevenlabs"), local or FakeSynthesizer("local"),
+                                 mode="auto", **kwargs)
+
+    def chosen(p, text="A reply long enough to go to the cloud voice."):
+        return p.choose(text)[0].name
+
+    if chosen(policy(cloud=FakeSynthesizer("elevenlabs", available=False))) != "local":
+        failures.append("no API key did not choose the local voice")
+    if chosen(policy(local=FakeSynthesizer("local", available=False),
+                     cloud=FakeSynthesizer("elevenlabs", available=False))) != "elevenlabs":
+        failures.append("without pyttsx3 the cloud voice was not kept")
+    p = policy(local_max_chars=20)
+    if chosen(p, "Sure, one moment.") != "local" or chosen(p) != "elevenlabs":
+        failures.append("short-reply routing is wrong")
+
+    # Error rate: over the limit switches to local, and ElevenLabs is probed again after the retry period
+    p = policy(cloud=FakeSynthesizer("elevenlabs", fail_at=0), max_error_rate=0.5, retry_seconds=0.2)
+    p.speak("A reply long enough to go to the cloud voice.")
+    if chosen(p) != "local":
+        failures.append("a failing ElevenLabs was not skipped")
+    time.sleep(0.25)
+    if chosen(p) != "elevenlabs":
+        failures.append("ElevenLabs was not retried after TTS_RETRY_SECONDS")
+
+    # Latency budget: a slow median first sound switches to local
+    p = policy(cloud=FakeSynthesizer("elevenlabs", first_sound=2.0), latency_budget=1.5)
+    for _ in range(3):
+        p.speak("A reply long enough to go to the cloud voice.")
+    if chosen(p) != "local":
+        failures.append("a slow ElevenLabs was not skipped")
+
+    # A failure partway through carries on from the first unplayed sentence
+    sentences = ["The first sentence is long enough to be its own request.",
+                 "The second sentence is also long enough to stand alone.",
+                 "And the third sentence finishes the reply off nicely."]
+    cloud = FakeSynthesizer("elevenlabs", fail_at=1)
+    local = FakeSynthesizer("local")
+    policy(cloud, local).speak(" ".join(sentences))
+    if cloud.spoken != sentences[:1] or local.spoken != sentences[1:]:
+        failures.append(f"partial failure: cloud said {cloud.spoken}, local said {local.spoken}")
+
+    # Stop while the local voice is still synthesizing: nothing plays
+    output = NullOutput()
+    synthesizer = LocalSynthesizer(playback=PlaybackEngine(output))
+
+    def slow_synthesize(text):
+        time.sleep(0.3)
+        return tone(0.5, 22050), 22050, 1
+
+    synthesizer.synthesize = slow_synthesize
+    threading.Timer(0.1, synthesizer.playback.stop).start()
+    started = time.perf_counter()
+    synthesizer.speak("Stopped before it is heard.")
+    if output.frames_written or time.perf_counter() - started > 0.4:
+        failures.append(f"Stop during local synthesis still played {output.frames_written / 22050:.2f} s")
+
+    # The macOS driver writes AIFF even when asked for a .wav file
+    pcm = tone(0.1, 22050)
+
+    def aiff(form, little_endian=False):
+        samples = array("h", pcm)
+        if not little_endian:
+            samples.byteswap()
+        # 22050 as an 80-bit extended float: 2^14 <= 22050 < 2^15
+        common = struct.pack(">hIhHQ", 1, len(samples), 16, 16383 + 14, 22050 << (63 - 14))
+        if form == b"AIFC":
+            common += b"sowt" if little_endian else b"NONE"
+        sound = struct.pack(">II", 0, 0) + samples.tobytes()
+        body = form + struct.pack(">4sI", b"COMM", len(common)) + common + struct.pack(">4sI", b"SSND", len(sound)) + sound
+        return b"FORM" + struct.pack(">I", len(body)) + body
+
+    def wav(path):
+        with wave.open(path, "wb") as audio:
+            audio.setnchannels(1)
+            audio.setsampwidth(2)
+            audio.setframerate(22050)
+            audio.writeframes(pcm)
+
+    class FakeDriver:
+        def __init__(self, write):
+            self.write = write
+
+        def save_to_file(self, text, path):
+            self.path = path
+
+        def runAndWait(self):
+            self.write(self.path)
+
+    def write_bytes(data):
+        def write(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        return write
+
+    for label, write in [("WAV", wav), ("AIFF", write_bytes(aiff(b"AIFF"))),
+                         ("AIFF-C", write_bytes(aiff(b"AIFC"))), ("AIFF-C sowt", write_bytes(aiff(b"AIFC", True)))]:
+        synthesizer = LocalSynthesizer(playback=PlaybackEngine(NullOutput()))
+        synthesizer._driver = FakeDriver(write)
+        try:
+            result = synthesizer.synthesize("Hello.")
+        except RuntimeError as e:
+            result = str(e)
+        if result != (pcm, 22050, 1):
+            failures.append(f"local voice {label} output read as {result if isinstance(result, str) else result[1:]}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the synthesis real-time factor of each TTS backend")
+    parser.add_argument("--backend", choices=[ElevenLabsSynthesizer.name, LocalSynthesizer.name])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true", help="check the selection policy against fakes")
+    args = parser.parse_args()
+    if args.check:
+        failures = check()
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        print("All synthesizer checks passed" if not failures else f"{len(failures)} synthesizer checks failed")
+        raise SystemExit(1 if failures else 0)
+    backends = [ElevenLabsSynthesizer(), LocalSynthesizer()]
+    benchmark([b for b in backends if args.backend in (None, b.name)], args.repeat)
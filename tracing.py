@@ -0,0 +1,146 @@
+"""
+Per-turn latency spans.
+
+Spans are appended to a rotating file in the Chrome trace event format (open it in
+chrome://tracing or https://ui.perfetto.dev), one file per run named after its start
+time and process ID (trace-20250101-120000-4242.json), and kept in a rolling window per stage
+for p50/p95/p99 summaries.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from decouple import config
+
+TRACE_ENABLED = config('TRACE_ENABLED', default=True, cast=bool)
+TRACE_FILE = config('TRACE_FILE', default=str(Path.home() / ".cache" / "mach" / "trace.json"))
+TRACE_MAX_MB = config('TRACE_MAX_MB', default=10, cast=float)
+TRACE_BACKUPS = config('TRACE_BACKUPS', default=3, cast=int)
+# Trace files of earlier runs that are kept
+TRACE_KEEP_RUNS = config('TRACE_KEEP_RUNS', default=10, cast=int)
+# Recent spans per stage that the percentiles are computed over
+TRACE_WINDOW = config('TRACE_WINDOW', default=200, cast=int)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class Tracer:
+    """Records spans tagged with the current turn ID"""
+
+    def __init__(self, path=TRACE_FILE, max_mb=TRACE_MAX_MB, backups=TRACE_BACKUPS, window=TRACE_WINDOW,
+                 enabled=TRACE_ENABLED, keep_runs=TRACE_KEEP_RUNS):
+        self.base_path = Path(path) if path else None
+        self.path = None
+        if self.base_path:
+            run = time.strftime("%Y%m%d-%H%M%S")
+            self.path = self.base_path.with_name(f"{self.base_path.stem}-{run}-{os.getpid()}{self.base_path.suffix}")
+        self.keep_runs = keep_runs
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.backups = backups
+        self.enabled = enabled
+        self.turn = 0
+        self.durations = defaultdict(lambda: deque(maxlen=window))
+        self._file = None
+        self._lock = threading.Lock()
+        # Trace timestamps are wall-clock microseconds, measured with the monotonic clock
+        self._epoch = time.time() - time.perf_counter()
+
+    def new_turn(self):
+        """Start a new turn; later spans carry its ID"""
+        with self._lock:
+            self.turn += 1
+            return self.turn
+
+    @contextmanager
+    def span(self, name, **args):
+        """Time the body of a with block"""
+        turn = self.turn
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter() - started, turn=turn, **args)
+
+    def record(self, name, started, duration, turn=None, **args):
+        """Add a span measured elsewhere; started is a time.perf_counter() value"""
+        if not self.enabled or duration is None:
+            return
+        event = {
+            "name": name,
+            "cat": "turn",
+            "ph": "X",
+            "ts": int((self._epoch + started) * 1e6),
+            "dur": int(duration * 1e6),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": dict(args, turn=self.turn if turn is None else turn),
+        }
+        with self._lock:
+            self.durations[name].append(duration)
+            self._write(event)
+
+    def _write(self, event):
+        # Called with the lock held
+        if self.path is None:
+            return
+        try:
+            if self._file is None:
+                self._open()
+            elif self._file.tell() > self.max_bytes:
+                self._rotate()
+            self._file.write(json.dumps(event) + ",\n")
+        except OSError as e:
+            print(f"Tracing disabled: {str(e)}")
+            self.path = None
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self._file is None:
+            self._prune_runs()
+        # One file per run; the JSON array format may be left unterminated
+        self._file = open(self.path, "w", buffering=1, encoding="utf-8")
+        self._file.write("[\n")
+
+    def _prune_runs(self):
+        """Delete the trace files (and their rotated backups) of all but the newest earlier runs"""
+        pattern = f"{self.base_path.stem}-*{self.base_path.suffix}"
+        runs = sorted((path for path in self.path.parent.glob(pattern) if path != self.path),
+                      key=lambda path: path.stat().st_mtime, reverse=True)
+        for run in runs[max(0, self.keep_runs):]:
+            for path in self.path.parent.glob(f"{run.name}*"):
+                path.unlink(missing_ok=True)
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                older.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backups > 0:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        self._open()
+
+    def summary(self):
+        """{stage: {"count", "p50", "p95", "p99"}} over the rolling window, in milliseconds"""
+        with self._lock:
+            stages = {name: list(values) for name, values in self.durations.items()}
+        return {name: {"count": len(values),
+                       "p50": round(percentile(values, 0.5) * 1000, 1),
+                       "p95": round(percentile(values, 0.95) * 1000, 1),
+                       "p99": round(percentile(values, 0.99) * 1000, 1)}
+                for name, values in stages.items()}
+
+    def format_summary(self):
+        lines = [f"  {name}: p50 {stats['p50']:.0f} ms, p95 {stats['p95']:.0f} ms, p99 {stats['p99']:.0f} ms "
+                 f"({stats['count']} spans)" for name, stats in self.summary().items()]
+        return "Latency (recent turns):\n" + "\n".join(lines)
+
+
+# Shared by every module so spans from all threads land in one trace
+tracer = Tracer()
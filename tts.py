@@ -0,0 +1,93 @@
+"""Text to speech helpers for the ElevenLabs API"""
+import time
+import http_session
+from decouple import config
+from playback import get_engine
+
+ELEVENLABS_API_KEY = config('ELEVENLABS_API_KEY', default='')
+# Overridable so the client can be pointed at a local fake server
+ELEVENLABS_BASE_URL = config('ELEVENLABS_BASE_URL', default='https://api.elevenlabs.io')
+
+VOICE_ID = "pNInz6obpgDQGcFmaJgB"  # Adam's voice ID
+MODEL_ID = "eleven_monolingual_v1"
+VOICE_SETTINGS = {
+    "stability": 0.71,
+    "similarity_boost": 0.5
+}
+
+# Play audio as it arrives instead of downloading the whole file first
+TTS_STREAMING = config('TTS_STREAMING', default=True, cast=bool)
+TTS_CHUNK_SIZE = config('TTS_CHUNK_SIZE', default=4096, cast=int)
+# Raw 16-bit PCM plays without a decoder; "mp3_44100_128" and friends need miniaudio
+TTS_OUTPUT_FORMAT = config('TTS_OUTPUT_FORMAT', default='pcm_22050')
+
+
+def output_format():
+    """(codec, sample rate) of TTS_OUTPUT_FORMAT, e.g. ("pcm", 22050)"""
+    codec, rate = TTS_OUTPUT_FORMAT.split("_")[:2]
+    return codec, int(rate)
+
+
+def request_speech(text, stream=True):
+    """Send the text to ElevenLabs and return the (possibly streaming) response"""
+    url = f"{ELEVENLABS_BASE_URL}/v1/text-to-speech/{VOICE_ID}"
+    if stream:
+        url += "/stream"
+
+    codec, _ = output_format()
+    headers = {
+        "Accept": "audio/mpeg" if codec == "mp3" else "audio/pcm",
+        "Content-Type": "application/json",
+        "xi-api-key": ELEVENLABS_API_KEY
+    }
+
+    data = {
+        "text": text,
+        "model_id": MODEL_ID,
+        "voice_settings": VOICE_SETTINGS
+    }
+
+    return http_session.post(url, json=data, headers=headers, params={"output_format": TTS_OUTPUT_FORMAT},
+                             stream=stream)
+
+
+def play_stream(chunks, started=None):
+    """
+    Play audio chunks on the in-process playback engine as they arrive.
+    Returns first-byte, first-sound and total latencies in seconds, measured from `started`.
+    """
+    if started is None:
+        started = time.perf_counter()
+    codec, rate = output_format()
+    if codec == "mp3":
+        # Decoded whole, so MP3 output gives up streaming
+        from playback import decode_mp3
+        audio = b"".join(chunks)
+        first_byte = time.perf_counter() - started
+        timings = get_engine().play([decode_mp3(audio, rate)], rate, started=started)
+        timings["first_byte"] = first_byte
+        return timings
+    return get_engine().play(chunks, rate, started=started)
+
+
+def stop_playback():
+    """Interrupt the utterance that is currently playing"""
+    get_engine().stop()
+
+
+def pause_playback():
+    get_engine().pause()
+
+
+def resume_playback():
+    get_engine().resume()
+
+
+def format_timings(timings):
+    """Format latency timings for logging"""
+    parts = []
+    for key in ("first_byte", "first_sound", "total"):
+        value = timings.get(key)
+        if value is not None:
+            parts.append(f"{key.replace('_', ' ')}: {value * 1000:.0f} ms")
+    return ", ".join(parts)
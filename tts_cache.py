@@ -0,0 +1,162 @@
+"""Persistent, content-addressed cache for synthesized speech"""
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from decouple import config
+from tts import VOICE_ID, MODEL_ID, VOICE_SETTINGS, TTS_OUTPUT_FORMAT, output_format, request_speech
+
+TTS_CACHE_ENABLED = config('TTS_CACHE_ENABLED', default=True, cast=bool)
+TTS_CACHE_DIR = config('TTS_CACHE_DIR', default=str(Path.home() / ".cache" / "mach" / "tts"))
+TTS_CACHE_MAX_MB = config('TTS_CACHE_MAX_MB', default=100, cast=float)
+# Names this cache writes: a cache_key() hash plus the audio format, and mkstemp's partial writes
+ENTRY_NAME = re.compile(r"[0-9a-f]{64}\.(mp3|pcm)")
+PARTIAL_NAME = re.compile(r"tmp\w+\.part")
+
+
+def cache_key(text, voice_id=VOICE_ID, model_id=MODEL_ID, voice_settings=VOICE_SETTINGS,
+              audio_format=TTS_OUTPUT_FORMAT):
+    """Hash everything that changes the rendered audio into a stable key"""
+    payload = json.dumps({
+        "text": text,
+        "voice_id": voice_id,
+        "model_id": model_id,
+        "voice_settings": voice_settings,
+        "output_format": audio_format
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Audio files on disk (.pcm or .mp3), named by content hash, evicted least recently used first"""
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=int(TTS_CACHE_MAX_MB * 1024 * 1024),
+                 suffix=f".{output_format()[0]}"):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._remove_other_formats()
+        # Recover the total size from whatever is already on disk
+        self._size = sum(path.stat().st_size for path in self._entries())
+
+    def _remove_other_formats(self):
+        """Delete audio cached in another output format; it can never be hit and would escape the size cap"""
+        for path in self.directory.iterdir():
+            # Anything else in the directory is not ours to delete
+            stale = (ENTRY_NAME.fullmatch(path.name) and path.suffix != self.suffix) or PARTIAL_NAME.fullmatch(path.name)
+            if stale and path.is_file():
+                try:
+                    path.unlink()
+                except OSError as e:
+                    print(f"Could not remove stale cache entry {path.name}: {str(e)}")
+
+    def _entries(self):
+        return [path for path in self.directory.glob(f"*{self.suffix}") if ENTRY_NAME.fullmatch(path.name)]
+
+    def _path(self, key):
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key):
+        """Return cached audio bytes, or None on a miss"""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Touch the file so its mtime tracks the last use for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        """Store audio atomically, then evict old entries if over the size cap"""
+        if not data or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            # Write to a temp file in the same directory, then rename over the target
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self._size += len(data) - previous
+            self._evict()
+
+    def _evict(self):
+        if self._size <= self.max_bytes:
+            return
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                self._size -= size
+            except FileNotFoundError:
+                pass
+
+
+def canned_phrases():
+    """Every fixed phrase in utils.py, formatted the way speak() will receive it"""
+    from utils import opening_text, conversation_responses, convenience_text
+    username = config('USER', default='Sir')
+    botname = config('BOTNAME', default='MAch')
+
+    phrases = list(opening_text) + [convenience_text]
+    for responses in conversation_responses.values():
+        for response in responses:
+            phrases.append(response.format(BOTNAME=botname, USERNAME=username))
+    return phrases
+
+
+def warm_up(cache=None, phrases=None):
+    """Pre-render the given phrases (every canned phrase by default) that are not cached yet"""
+    # Imported here because speech.py imports this module
+    from speech import split_sentences
+    cache = cache or TTSCache()
+    rendered = 0
+    # Playback looks the cache up one sentence at a time, so that is how phrases are stored
+    sentences = dict.fromkeys(sentence for phrase in phrases or canned_phrases()
+                              for sentence in split_sentences(phrase))
+    for text in sentences:
+        key = cache_key(text)
+        if cache.get(key) is not None:
+            continue
+        response = request_speech(text, stream=False)
+        if response.status_code == 200:
+            cache.put(key, response.content)
+            rendered += 1
+            print(f"Cached: {text}")
+        else:
+            print(f"Error from ElevenLabs API: {response.status_code}")
+            print(response.text)
+    return rendered
+
+
+if __name__ == "__main__":
+    if "--warm" in sys.argv[1:]:
+        count = warm_up()
+        print(f"Rendered {count} new phrases into {TTS_CACHE_DIR}")
+    else:
+        print("Usage: python tts_cache.py --warm")
@@ -0,0 +1,177 @@
+"""
+Per-turn fetch memoization and concurrent fan-out.
+
+Everything a handler fetches goes through the current TurnScope, so one turn never
+fetches the same resource twice (even when two threads ask at the same moment),
+and independent fetches run side by side on a shared executor with deadlines.
+"""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from decouple import config
+
+FETCH_WORKERS = config('FETCH_WORKERS', default=8, cast=int)
+# How long a handler waits for a fetch before answering without it
+FETCH_DEADLINE = config('FETCH_DEADLINE', default=8, cast=float)
+
+
+class FetchTimeout(Exception):
+    """A fetch did not finish before its deadline"""
+
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+
+
+class TurnScope:
+    """Results fetched during one turn, keyed by function and arguments"""
+
+    def __init__(self, executor=_executor):
+        self.executor = executor
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Start fn(*args) on the executor, or return the future of the identical call already made"""
+        key = (fn, args, tuple(sorted(kwargs.items())))
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = self.executor.submit(fn, *args, **kwargs)
+                self._futures[key] = future
+        return future
+
+    def fetch(self, fn, *args, timeout=FETCH_DEADLINE, **kwargs):
+        """Memoized fn(*args); raises FetchTimeout past the deadline"""
+        try:
+            return self.submit(fn, *args, **kwargs).result(timeout=timeout)
+        except TimeoutError:
+            raise FetchTimeout(f"{getattr(fn, '__name__', fn)} missed its {timeout:.1f} s deadline")
+
+    def gather(self, calls, timeout=FETCH_DEADLINE, default=None):
+        """
+        Run {name: (fn, *args)} concurrently and return {name: result}.
+        A call that fails or misses its deadline (a number, or {name: seconds}) gets the default.
+        """
+        started = time.perf_counter()
+        futures = {name: self.submit(fn, *args) for name, (fn, *args) in calls.items()}
+        results = {}
+        for name, future in futures.items():
+            deadline = timeout.get(name, FETCH_DEADLINE) if isinstance(timeout, dict) else timeout
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - (time.perf_counter() - started)))
+            except TimeoutError:
+                print(f"Fetch '{name}' missed its {deadline:.1f} s deadline")
+                results[name] = default
+            except Exception as e:
+                print(f"Fetch '{name}' failed: {str(e)}")
+                results[name] = default
+        return results
+
+
+_scope = TurnScope()
+
+
+def new_turn():
+    """Forget the previous turn's results"""
+    global _scope
+    _scope = TurnScope()
+    return _scope
+
+
+def fetch(fn, *args, timeout=FETCH_DEADLINE, **kwargs):
+    return _scope.fetch(fn, *args, timeout=timeout, **kwargs)
+
+
+def submit(fn, *args, **kwargs):
+    return _scope.submit(fn, *args, **kwargs)
+
+
+def gather(calls, timeout=FETCH_DEADLINE, default=None):
+    return _scope.gather(calls, timeout, default)
+
+
+def check():
+    """Count outbound calls against stubs; returns a list of failures"""
+    failures = []
+    calls = []
+
+    def stub(name, delay=0.0):
+        def fetcher(*args):
+            calls.append(name)
+            time.sleep(delay)
+            return f"{name} result"
+        return fetcher
+
+    # The same fetch twice in one turn, including from two threads at once, is one call
+    news = stub("news", delay=0.05)
+    new_turn()
+    threads = [threading.Thread(target=fetch, args=(news,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    fetch(news)
+    if calls.count("news") != 1:
+        failures.append(f"news fetched {calls.count('news')} times in one turn, expected 1")
+
+    # A new turn fetches again
+    new_turn()
+    fetch(news)
+    if calls.count("news") != 2:
+        failures.append(f"news fetched {calls.count('news')} times over two turns, expected 2")
+
+    # Independent sources run concurrently and a slow one is cut off at its deadline
+    new_turn()
+    started = time.perf_counter()
+    results = gather({"a": (stub("a", 0.2),), "b": (stub("b", 0.2),), "slow": (stub("slow", 1.0),)},
+                     timeout={"a": 1.0, "b": 1.0, "slow": 0.3})
+    elapsed = time.perf_counter() - started
+    if results != {"a": "a result", "b": "b result", "slow": None}:
+        failures.append(f"gather returned {results}")
+    if elapsed > 0.45:
+        failures.append(f"gather took {elapsed:.2f} s, expected the sources to overlap")
+
+    failures.extend(check_handlers())
+    return failures
+
+
+def check_handlers():
+    """Run the fetching handlers against stub online_ops and count their calls per turn"""
+    import types
+    counts = {}
+
+    def counted(name, value):
+        def fetcher(*args):
+            counts[name] = counts.get(name, 0) + 1
+            return value
+        return fetcher
+
+    stubs = types.ModuleType("functions.online_ops")
+    stubs.get_latest_news = counted("get_latest_news", ["Headline one", "Headline two"])
+    stubs.get_trending_movies = counted("get_trending_movies", ["Movie one", "Movie two"])
+    stubs.get_random_joke = counted("get_random_joke", "A joke")
+    stubs.get_random_advice = counted("get_random_advice", "Some advice")
+    sys.modules["functions.online_ops"] = stubs
+
+    import main
+    from sinks import RecordingSink
+    main.output_sink = RecordingSink()
+
+    failures = []
+    for intent, fetcher in (("news", "get_latest_news"), ("trending_movies", "get_trending_movies"),
+                            ("joke", "get_random_joke"), ("advice", "get_random_advice")):
+        counts.clear()
+        main.dispatch(intent, intent)
+        main.speech_queue.wait_idle()
+        if counts.get(fetcher) != 1:
+            failures.append(f"{intent} turn called {fetcher} {counts.get(fetcher, 0)} times, expected 1")
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("All fetch checks passed" if not failures else f"{len(failures)} fetch checks failed")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,145 @@
+"""
+Headless UI benchmarks, run on Qt's offscreen platform.
+
+Usage: python ui_benchmark.py chat [messages]
+       python ui_benchmark.py signals [turns]
+       python ui_benchmark.py paint [frames]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Keep benchmark traffic out of the real chat history
+os.environ.setdefault("CHAT_HISTORY_FILE", os.path.join(tempfile.mkdtemp(), "chat_history.jsonl"))
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+from jarvis_ui import CommunicationChannel, MAchUI, GlowingCircle
+from tracing import percentile
+
+
+def resident_memory_mb():
+    """Current resident set size (Linux), falling back to peak RSS elsewhere"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_chat(count=100000, batch=100):
+    """Push messages through CommunicationChannel.add_message and time each repaint"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    comm = CommunicationChannel()
+    window = MAchUI(comm)
+    window.show()
+    app.processEvents()
+
+    memory_before = resident_memory_mb()
+    frame_times = []
+    kinds = ["user", "assistant", "status", "error"]
+    started = time.perf_counter()
+    for i in range(count):
+        comm.add_message(f"Message {i}: the quick brown fox jumps over the lazy dog", kinds[i % 4])
+        if i % batch == batch - 1:
+            # One "frame": deliver the queued updates and repaint the window
+            frame_started = time.perf_counter()
+            app.processEvents()
+            window.repaint()
+            frame_times.append(time.perf_counter() - frame_started)
+    total = time.perf_counter() - started
+
+    print(f"{count} messages in {total:.2f} s ({total / count * 1e6:.1f} us per message)")
+    print(f"Frame time: p50 {percentile(frame_times, 0.5) * 1000:.2f} ms, "
+          f"p99 {percentile(frame_times, 0.99) * 1000:.2f} ms, last {frame_times[-1] * 1000:.2f} ms")
+    print(f"Resident memory: {memory_before:.1f} MB before, {resident_memory_mb():.1f} MB after")
+    window.close()
+
+
+def bench_signals(turns=5000):
+    """
+    A worker thread sends what a burst of spoken replies sends (status, message, status),
+    then the GUI thread's time to deliver all of it is measured, with and without coalescing.
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    for coalesce in (False, True):
+        comm = CommunicationChannel(coalesce=coalesce)
+        window = MAchUI(comm)
+        window.show()
+        app.processEvents()
+        delivered = []
+        comm.update_signal.connect(lambda message, msg_type: delivered.append(message))
+
+        def worker():
+            for i in range(turns):
+                comm.update_status("speaking")
+                comm.add_message(f"Reply {i}: the quick brown fox jumps over the lazy dog", "assistant")
+                comm.update_status("listening")
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        started = time.perf_counter()
+        while len(delivered) < turns:
+            app.processEvents()
+        app.processEvents()
+        window.repaint()
+        elapsed = time.perf_counter() - started
+
+        label = "coalesced" if coalesce else "direct"
+        print(f"{label}: {elapsed * 1000:.1f} ms on the GUI thread for {turns} turns "
+              f"({elapsed / turns * 1e6:.1f} us per message, status {window.status})")
+        window.close()
+
+
+def run_event_loop(app, seconds):
+    """Run the Qt event loop for a while and return the CPU time it used"""
+    cpu_started = time.process_time()
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec_()
+    return time.process_time() - cpu_started
+
+
+def bench_paint(frames=2000, seconds=3):
+    """Time GlowingCircle frames, then the whole window's CPU use while idle and while animating"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    logo = GlowingCircle()
+    logo.show()
+    app.processEvents()
+
+    paint_times = []
+    for i in range(frames):
+        # Walk through the same range of values the animations produce
+        logo.set_pulse_scale(0.95 + 0.1 * (i % 60) / 60)
+        logo.set_opacity(0.7 + 0.3 * (i % 45) / 45)
+        started = time.perf_counter()
+        logo.repaint()
+        paint_times.append(time.perf_counter() - started)
+    logo.close()
+    print(f"Paint: p50 {percentile(paint_times, 0.5) * 1e6:.0f} us, p99 {percentile(paint_times, 0.99) * 1e6:.0f} us "
+          f"per frame ({frames} frames)")
+
+    window = MAchUI(CommunicationChannel())
+    window.show()
+    app.processEvents()
+    for status in ("idle", "listening"):
+        window.update_status(status)
+        cpu = run_event_loop(app, seconds)
+        print(f"Window {status}: {cpu / seconds * 100:.1f}% of one core")
+    window.close()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "chat"
+    if command == "chat":
+        bench_chat(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    elif command == "signals":
+        bench_signals(int(sys.argv[2]) if len(sys.argv) > 2 else 5000)
+    elif command == "paint":
+        bench_paint(int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
+    else:
+        print(__doc__.strip())
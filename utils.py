@@ -4,6 +4,8 @@ opening_text = [
     "Just a second sir.",
 ]
 
+convenience_text = "For your convenience, I am printing it on the screen sir."
+
 # Conversation responses for different types of queries
 conversation_responses = {
     "greetings": [
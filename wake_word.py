@@ -0,0 +1,114 @@
+"""
+Local "Hey MAch" wake word spotting.
+
+Idle CPU budget: while nobody is talking, the only work is the capture thread's
+energy VAD (about 50 us per 30 ms frame, under 1% of one core). The keyword
+spotter runs only on utterances the VAD cuts, using a Vosk recognizer restricted
+to a tiny grammar of wake phrases, so nothing leaves the machine until the
+wake phrase has been heard.
+"""
+import json
+import sys
+import threading
+import time
+import speech_recognition as sr
+from decouple import config, Csv
+from recognizers import VOSK_MODEL_PATH
+
+WAKE_WORD_ENABLED = config('WAKE_WORD_ENABLED', default=True, cast=bool)
+# "MAch" is not a dictionary word, so accept the ways a small model is likely to hear it
+WAKE_PHRASES = config('WAKE_PHRASES', default='hey mach,hey mack,hey mark,hey mac,hey max,hey mock', cast=Csv())
+# Longer utterances are commands, not a wake phrase, and are skipped without decoding
+WAKE_MAX_SECONDS = config('WAKE_MAX_SECONDS', default=3, cast=float)
+
+
+class WakeWordDetector:
+    """Grammar-restricted Vosk keyword spotter"""
+    sample_rate = 16000
+
+    def __init__(self, phrases=WAKE_PHRASES, model_path=VOSK_MODEL_PATH):
+        self.phrases = [phrase.strip().lower() for phrase in phrases if phrase.strip()]
+        self.model_path = model_path
+        self.model = None
+
+    def load(self):
+        """Load the model; raises sr.RequestError if vosk or the model is missing"""
+        if self.model is None:
+            from recognizers import VoskBackend
+            self.model = VoskBackend(self.model_path).load()
+        return self.model
+
+    def detect(self, audio):
+        """Return True if the utterance is one of the wake phrases"""
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        if duration > WAKE_MAX_SECONDS:
+            return False
+
+        from vosk import KaldiRecognizer
+        grammar = json.dumps(self.phrases + ["[unk]"])
+        recognizer = KaldiRecognizer(self.load(), self.sample_rate, grammar)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        return any(phrase in text for phrase in self.phrases)
+
+
+class WakeWordListener:
+    """Watches the capture stream while the assistant is idle and calls on_wake on the wake phrase"""
+
+    def __init__(self, capture, on_wake, is_idle, detector=None):
+        self.capture = capture
+        self.on_wake = on_wake
+        self.is_idle = is_idle
+        self.detector = detector or WakeWordDetector()
+        self._thread = None
+
+    def start(self):
+        """Start spotting; returns False if no local model is available"""
+        try:
+            self.detector.load()
+        except sr.RequestError as e:
+            print(f"Wake word disabled: {str(e)}")
+            return False
+        self._thread = threading.Thread(target=self._run, name="wake-word", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        while True:
+            if not self.is_idle():
+                # The assistant loop owns the utterances while it is running
+                time.sleep(0.2)
+                continue
+            try:
+                audio = self.capture.next_utterance(timeout=0.5)
+            except sr.WaitTimeoutError:
+                continue
+            if not self.is_idle():
+                # Started some other way (e.g. the Wake button); hand the utterance back
+                self.capture.put(audio)
+                continue
+            try:
+                if self.detector.detect(audio):
+                    print("Wake word detected")
+                    self.on_wake()
+            except Exception as e:
+                print(f"Wake word error: {str(e)}")
+
+
+if __name__ == "__main__":
+    # Replay recordings through the same capture and spotting path used live:
+    # python wake_word.py with_wake.wav without_wake.wav
+    from capture import ContinuousCapture, PCMFileSource
+    detector = WakeWordDetector()
+    for path in sys.argv[1:]:
+        capture = ContinuousCapture(PCMFileSource(path), max_queued=0)
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        capture.start()
+        capture.finished.wait()
+        detected = False
+        while not capture.utterances.empty():
+            detected = detector.detect(capture.utterances.get()) or detected
+        print(f"{path}: wake word {'detected' if detected else 'not detected'} "
+              f"({(time.process_time() - cpu_started) * 1000:.0f} ms CPU, "
+              f"{(time.perf_counter() - started) * 1000:.0f} ms wall)")
@@ -0,0 +1,292 @@
+"""Weather providers and a stale-while-revalidate weather cache"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from decouple import config
+import http_session
+
+WEATHER_LOCATION = config('WEATHER_LOCATION', default='Leander,Texas')
+# Served as-is while fresh
+WEATHER_TTL = config('WEATHER_TTL', default=600, cast=float)
+# Served (while a refresh runs in the background) until this old
+WEATHER_MAX_STALE = config('WEATHER_MAX_STALE', default=6 * 3600, cast=float)
+# How often the background task refreshes cached locations
+WEATHER_REFRESH_INTERVAL = config('WEATHER_REFRESH_INTERVAL', default=WEATHER_TTL * 0.8, cast=float)
+
+# "race" queries every provider at once, "hedge" starts the backups after a short delay,
+# "sequential" only tries the next provider after the previous one failed
+WEATHER_STRATEGY = config('WEATHER_STRATEGY', default='hedge')
+WEATHER_HEDGE_DELAY = config('WEATHER_HEDGE_DELAY', default=0.5, cast=float)
+WEATHER_DEADLINE = config('WEATHER_DEADLINE', default=10, cast=float)
+# A provider that fails this many times in a row is skipped for the cooldown period
+BREAKER_FAILURES = config('WEATHER_BREAKER_FAILURES', default=3, cast=int)
+BREAKER_COOLDOWN = config('WEATHER_BREAKER_COOLDOWN', default=300, cast=float)
+
+# Overridable so providers can be pointed at local stub servers
+WTTR_URL = config('WTTR_URL', default='https://wttr.in')
+GOWEATHER_URL = config('GOWEATHER_URL', default='https://goweather.herokuapp.com')
+
+
+def unknown_weather():
+    """Default values used when every provider fails"""
+    return {
+        "success": False,
+        "city": "Leander",
+        "region": "Texas",
+        "country": "United States",
+        "weather": "unknown",
+        "temperature": "unknown",
+        "feels_like": "unknown"
+    }
+
+
+def fetch_wttr(location):
+    """wttr.in, which is reliable and doesn't require API keys"""
+    # Encode the location for URL
+    encoded_location = location.replace(" ", "+")
+    response = http_session.get(f"{WTTR_URL}/{encoded_location}?format=j1")
+    response.raise_for_status()
+
+    weather_data = response.json()
+    current = weather_data["current_condition"][0]
+
+    # Extract the data we need
+    weather_desc = current["weatherDesc"][0]["value"]
+    temp_f = current["temp_F"]  # Using Fahrenheit for US locations
+    feels_like = current["FeelsLikeF"] + "°F"
+
+    # Get location info
+    area = weather_data["nearest_area"][0]
+    return {
+        "success": True,
+        "city": area["areaName"][0]["value"],
+        "region": area["region"][0]["value"],
+        "country": area["country"][0]["value"],
+        "weather": weather_desc,
+        "temperature": f"{temp_f}°F",
+        "feels_like": feels_like
+    }
+
+
+def fetch_goweather(location):
+    """goweather, used as a backup"""
+    response = http_session.get(f"{GOWEATHER_URL}/weather/{location}")
+    response.raise_for_status()
+
+    data = response.json()
+    return {
+        "success": True,
+        "city": "Leander",
+        "region": "Texas",
+        "country": "United States",
+        "weather": data.get("description", "unknown"),
+        "temperature": data.get("temperature", "unknown"),
+        "feels_like": data.get("temperature", "unknown")  # This API doesn't provide feels like
+    }
+
+
+class CircuitBreaker:
+    """Skips a provider after repeated failures until a cooldown has passed"""
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Closed, or open long enough that one trial request may go through"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.time() - self.opened_at >= self.cooldown:
+                # Half-open: let a trial through and restart the cooldown in case it fails too
+                self.opened_at = time.time()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.max_failures:
+                self.opened_at = time.time()
+
+
+PROVIDERS = [
+    ("wttr.in", fetch_wttr),
+    ("goweather", fetch_goweather),
+]
+BREAKERS = {name: CircuitBreaker() for name, _ in PROVIDERS}
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="weather")
+
+
+def call_provider(name, fetch, location):
+    """Run one provider and update its circuit breaker"""
+    breaker = BREAKERS.setdefault(name, CircuitBreaker())
+    try:
+        data = fetch(location)
+        if not data.get("success") or data.get("temperature") in (None, "", "unknown"):
+            raise ValueError("incomplete weather data")
+    except Exception as e:
+        breaker.record_failure()
+        print(f"Weather API error ({name}): {str(e)}")
+        raise
+    breaker.record_success()
+    return data
+
+
+def available_providers(providers=None):
+    """Providers whose circuit breaker currently lets requests through"""
+    return [(name, fetch) for name, fetch in (providers or PROVIDERS)
+            if BREAKERS.setdefault(name, CircuitBreaker()).allow()]
+
+
+def fetch_sequential(location, providers):
+    for name, fetch in providers:
+        try:
+            return call_provider(name, fetch, location)
+        except Exception:
+            continue
+    return None
+
+
+def fetch_concurrent(location, providers, hedge_delay=0.0, deadline=WEATHER_DEADLINE):
+    """
+    Query providers concurrently and return the first valid result.
+    With a hedge delay the first provider gets a head start before the others are started.
+    """
+    started = time.time()
+    pending = set()
+    waiting = list(providers)
+
+    def launch(count):
+        for name, fetch in waiting[:count]:
+            pending.add(_executor.submit(call_provider, name, fetch, location))
+        del waiting[:count]
+
+    launch(1 if hedge_delay > 0 else len(waiting))
+    try:
+        while pending or waiting:
+            remaining = deadline - (time.time() - started)
+            if remaining <= 0:
+                return None
+            timeout = min(remaining, hedge_delay) if waiting else remaining
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+            # Hedge: start the backups when the delay passes or a provider fails early
+            if waiting and (not done or not pending):
+                launch(len(waiting))
+        return None
+    finally:
+        # Drop work that hasn't started; in-flight requests finish and are ignored
+        for future in pending:
+            future.cancel()
+
+
+def fetch_weather(location=WEATHER_LOCATION, strategy=WEATHER_STRATEGY):
+    """Fetch normalized weather using the configured provider strategy"""
+    providers = available_providers()
+    if strategy == "race":
+        data = fetch_concurrent(location, providers)
+    elif strategy == "hedge":
+        data = fetch_concurrent(location, providers, hedge_delay=WEATHER_HEDGE_DELAY)
+    else:
+        data = fetch_sequential(location, providers)
+    # Return default values if all APIs fail
+    return data or unknown_weather()
+
+
+class WeatherCache:
+    """
+    Per-location weather with a TTL. Stale entries are still served while a
+    background refresh runs, so callers only wait when nothing is cached at all.
+    """
+
+    def __init__(self, fetch=fetch_weather, ttl=WEATHER_TTL, max_stale=WEATHER_MAX_STALE):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries = {}  # location -> (fetched_at, data)
+        self._inflight = {}  # location -> Future of the fetch running for it
+        self._lock = threading.Lock()
+        self._prefetcher = None
+
+    def get(self, location=WEATHER_LOCATION):
+        """Return weather for the location, from the cache whenever possible"""
+        with self._lock:
+            entry = self._entries.get(location)
+        if entry:
+            age = time.time() - entry[0]
+            if age < self.ttl:
+                return entry[1]
+            if age < self.max_stale:
+                self.refresh_async(location)
+                return entry[1]
+        return self.refresh(location)
+
+    def refresh(self, location=WEATHER_LOCATION):
+        """
+        Fetch now, or wait for the fetch already running for this location (e.g. the
+        prefetcher's), so concurrent callers share one request
+        """
+        with self._lock:
+            future = self._inflight.get(location)
+            started = future is None
+            if started:
+                future = self._inflight[location] = Future()
+        if started:
+            self._fetch_into(location, future)
+        return future.result()
+
+    def refresh_async(self, location=WEATHER_LOCATION):
+        """Refresh in the background unless a refresh is already running"""
+        with self._lock:
+            if location in self._inflight:
+                return
+            future = self._inflight[location] = Future()
+        threading.Thread(target=self._fetch_into, args=(location, future), name="weather-refresh",
+                         daemon=True).start()
+
+    def _fetch_into(self, location, future):
+        """Fetch and resolve the future; a failed fetch never replaces good cached data"""
+        try:
+            data = self.fetch(location)
+            with self._lock:
+                self._inflight.pop(location, None)
+                if data["success"]:
+                    self._entries[location] = (time.time(), data)
+                elif location in self._entries:
+                    fetched_at, cached = self._entries[location]
+                    if time.time() - fetched_at < self.max_stale:
+                        data = cached
+            future.set_result(data)
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(location, None)
+            future.set_exception(e)
+
+    def start_prefetch(self, locations=(WEATHER_LOCATION,), interval=WEATHER_REFRESH_INTERVAL):
+        """Keep the given locations warm so they are fresh before anyone asks"""
+        if self._prefetcher is not None:
+            return
+
+        def prefetch():
+            while True:
+                for location in locations:
+                    try:
+                        self.refresh(location)
+                    except Exception as e:
+                        print(f"Weather prefetch error: {str(e)}")
+                time.sleep(interval)
+
+        self._prefetcher = threading.Thread(target=prefetch, name="weather-prefetch", daemon=True)
+        self._prefetcher.start()